@@ -16,6 +16,7 @@ class QueryResult:
     result: List[Dict[str, Any]]
     cached: bool
     statistics: QueryStatistics = field(default_factory=QueryStatistics)
+    schema: List[Dict[str, Any]] = field(default_factory=list)
     cached_at: Optional[str] = None
     error: Optional[str] = None
     is_error: bool = False
@@ -43,12 +44,14 @@ class QueryResult:
         
         stats_data = result_data.get("statistics", {})
         statistics = QueryStatistics(**stats_data)
+        schema = result_data.get("schema", [])
 
         return cls(
             query_id=query_id,
             result=result_rows,
             cached=cached,
             statistics=statistics,
+            schema=schema,
             cached_at=cached_at,
             is_error=is_error
         )
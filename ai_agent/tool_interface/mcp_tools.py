@@ -1,15 +1,39 @@
 import json
 from typing import Dict, Any, Optional, List
 
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) seconds. The read timeout leaves room for long-running queries.
+DEFAULT_TIMEOUT = (3.05, 300)
+
 class MCPTools:
-    def __init__(self, base_url: str = "http://localhost:8005"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8005",
+        session: Optional[requests.Session] = None,
+        timeout: Any = DEFAULT_TIMEOUT,
+    ):
         self.base_url = base_url
+        self.timeout = timeout
+        if session is None:
+            # One pooled session per client keeps TCP/TLS connections alive between calls.
+            # Retries only apply to idempotent methods, so queries are never re-submitted.
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=32,
+                max_retries=Retry(total=2, backoff_factor=0.2),
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
 
     def _post(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-        import requests
         url = self.base_url + endpoint
         try:
-            resp = requests.post(url, json=payload)
+            resp = self.session.post(url, json=payload, timeout=self.timeout)
             resp.raise_for_status()
             return resp.json()
         except Exception as e:
@@ -17,10 +41,9 @@ class MCPTools:
             raise
 
     def _get(self, endpoint: str) -> Dict[str, Any]:
-        import requests
         url = self.base_url + endpoint
         try:
-            resp = requests.get(url)
+            resp = self.session.get(url, timeout=self.timeout)
             resp.raise_for_status()
             return resp.json()
         except Exception as e:
@@ -0,0 +1,182 @@
+"""Shared pytest fixtures for the repository-level test scripts."""
+
+import itertools
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    """Import the Streamlit app once per test session."""
+    import streamlit_app.app as module
+
+    return module
+
+
+@pytest.fixture(scope="session")
+def sample_config(app_module):
+    """An OpenAI AgentConfig shared by tests that only read it."""
+    return app_module.AgentConfig(
+        base_url="http://localhost:8005",
+        user_id="test-user",
+        session_id="test-session",
+        use_cache=True,
+        maximum_bytes_billed=100_000_000,
+        row_limit=200,
+        model="gpt-4.1-mini",
+        provider=app_module.LLMProvider.OPENAI,
+    )
+
+
+class FakeOpenAIClient:
+    """Stand-in for openai.OpenAI that records each request and replays canned text.
+
+    Plan requests (those with a response_format) get the plan JSON, streamed
+    requests get summary_chunks, and anything else gets history_summary.
+    """
+
+    def __init__(
+        self, plan=None, summary_chunks=("Summary.",), history_summary="Summary so far."
+    ):
+        self.plan_text = (
+            plan if isinstance(plan, str) else json.dumps(plan or FAKE_PLAN)
+        )
+        self.summary_chunks = list(summary_chunks)
+        self.history_summary = history_summary
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.requests.append(kwargs)
+        if kwargs.get("response_format"):
+            text = self.plan_text
+            chunks = [text[i : i + 16] for i in range(0, len(text), 16)]
+        elif kwargs.get("stream"):
+            chunks = self.summary_chunks
+        else:
+            chunks = [self.history_summary]
+
+        if kwargs.get("stream"):
+            return iter(
+                SimpleNamespace(
+                    choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))]
+                )
+                for chunk in chunks
+            )
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="".join(chunks)))]
+        )
+
+    def requests_for(self, kind):
+        """Return the recorded requests of one kind: "plan", "summary" or "history"."""
+
+        def kind_of(request):
+            if request.get("response_format"):
+                return "plan"
+            return "summary" if request.get("stream") else "history"
+
+        return [request for request in self.requests if kind_of(request) == kind]
+
+
+class FakeMCPClient:
+    """Stand-in for MCPTools that answers every query with the same rows, or query_error."""
+
+    _instances = itertools.count()
+
+    def __init__(self, rows=None, columns=None, schemas=None, query_error=None):
+        # A unique base URL keeps process-wide caches keyed by URL apart between tests.
+        self.base_url = f"http://fake-mcp-{next(self._instances)}"
+        self.rows = FAKE_ROWS if rows is None else rows
+        self.columns = FAKE_COLUMNS if columns is None else columns
+        self.schemas = schemas or {}
+        self.query_error = query_error
+        self.queries = []
+        self.query_threads = []
+        self.schema_requests = []
+
+    def execute_bigquery_sql(self, sql, **kwargs):
+        self.queries.append(sql)
+        self.query_threads.append(threading.current_thread().name)
+        if self.query_error:
+            return {"content": [{"text": self.query_error}], "isError": True}
+        payload = {
+            "query_id": f"query-{len(self.queries)}",
+            "result": self.rows,
+            "cached": False,
+            "statistics": {"totalRows": len(self.rows), "totalBytesProcessed": 1024},
+            "schema": self.columns,
+        }
+        return {"content": [{"text": json.dumps(payload)}], "isError": False}
+
+    def get_table_schema(self, dataset_id, table_id, **kwargs):
+        self.schema_requests.append((dataset_id, table_id))
+        schema = self.schemas.get(f"{dataset_id}.{table_id}")
+        if schema is None:
+            return {"error": f"Table {dataset_id}.{table_id} not found"}
+        return {"schema": schema}
+
+
+FAKE_PLAN = {
+    "sql": "SELECT name, total FROM `proj.sales.orders`",
+    "analysis_steps": ["Read the orders table"],
+    "assumptions": [],
+    "follow_up_questions": [],
+    "confidence": 0.9,
+}
+FAKE_ROWS = [{"name": "a", "total": 1}, {"name": "b", "total": 2}]
+FAKE_COLUMNS = [
+    {"name": "name", "type": "STRING"},
+    {"name": "total", "type": "INTEGER"},
+]
+
+
+@pytest.fixture
+def fake_llm(app_module):
+    """Factory for an OpenAI LLMClientWrapper around a FakeOpenAIClient."""
+
+    def make(**kwargs):
+        return app_module.LLMClientWrapper(
+            provider=app_module.LLMProvider.OPENAI, client=FakeOpenAIClient(**kwargs)
+        )
+
+    return make
+
+
+@pytest.fixture
+def fake_mcp():
+    """Factory for a FakeMCPClient with a fresh base URL."""
+    return FakeMCPClient
+
+
+# Fixtures for test_llm_integration.py, which calls the real provider APIs. Each
+# provider's SDK client is built once per session; providers without an API key
+# are skipped.
+
+
+@pytest.fixture(scope="session", params=["OpenAI", "Anthropic", "Gemini"])
+def llm_provider(request, app_module):
+    """Each LLMProvider whose API key is set in the environment."""
+    provider = app_module.LLMProvider(request.param)
+    env_var = app_module.PROVIDER_API_KEY_ENV_VARS[provider]
+    if not os.getenv(env_var):
+        pytest.skip(f"{env_var} is not set")
+    return provider
+
+
+@pytest.fixture(scope="session")
+def llm_api_key(app_module, llm_provider):
+    return os.environ[app_module.PROVIDER_API_KEY_ENV_VARS[llm_provider]]
+
+
+@pytest.fixture(scope="session")
+def llm_model(app_module, llm_provider):
+    return app_module.PROVIDER_MODEL_DEFAULTS[llm_provider]
+
+
+@pytest.fixture(scope="session")
+def llm_client(app_module, llm_provider, llm_api_key):
+    return app_module.initialise_llm_client(llm_provider, llm_api_key)
@@ -0,0 +1,23 @@
+"""Output helpers shared by the standalone integration scripts."""
+import io
+import threading
+
+
+class ThreadLocalStdout(io.TextIOBase):
+    """Route print() output to a per-thread buffer when one is set."""
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def capture(self, buffer):
+        self._local.buffer = buffer
+
+    def release(self):
+        self._local.buffer = None
+
+    def write(self, text):
+        return (getattr(self._local, "buffer", None) or self._default).write(text)
+
+    def flush(self):
+        self._default.flush()
@@ -99,6 +99,10 @@ async def query_tool_handler(
         try:
             results = query_job.result()
             rows = [dict(row.items()) for row in results]
+            schema = [
+                {"name": schema_field.name, "type": schema_field.field_type}
+                for schema_field in (results.schema or [])
+            ]
 
             # Prepare statistics
             statistics = {
@@ -160,6 +164,7 @@ async def query_tool_handler(
                                 "result": rows,
                                 "cached": False,
                                 "statistics": statistics,
+                                "schema": schema,
                             },
                             indent=2,
                             cls=CustomJSONEncoder,
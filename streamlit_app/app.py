@@ -1,24 +1,29 @@
 """Streamlit AI data analyst agent powered by the BigQuery MCP server."""
 from __future__ import annotations
 
+import hashlib
 import json
 import os
+import re
 import sys
-from dataclasses import dataclass
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, MutableMapping, Optional
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import streamlit as st
 from requests.exceptions import RequestException
 
-# Conditional imports for LLM providers
-try:
-    from openai import OpenAI
-except ImportError:
-    OpenAI = None  # type: ignore
-
 # Ensure the repository root is on the Python path so we can import ai_agent modules
 REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
@@ -64,6 +69,56 @@ class AgentConfig:
 
 RESULT_PREVIEW_ROWS = 200
 RESULT_DOWNLOAD_ROWS = 1000
+HISTORY_SUMMARY_MAX_TOKENS = 500
+CSV_CHUNK_ROWS = 10_000
+CSV_SPOOL_MAX_BYTES = 16 * 1024 * 1024
+SMALL_COLUMN_DOCS_LIMIT = 32
+MAX_SCHEMA_WORKERS = 10
+MAX_SUMMARY_WORKERS = 4
+SCHEMA_CACHE_TTL_SECONDS = 300
+SCHEMA_ERROR_TTL_SECONDS = 60
+SCHEMA_CACHE_MAX_ENTRIES = 1024
+DATASET_CACHE_TTL_SECONDS = 60
+TURN_CACHE_MAX_ENTRIES = 128
+# Shortest opening question worth an LLM round trip. Follow-ups such as "top 5"
+# lean on the earlier answers, so they only need to be non-empty.
+MIN_QUESTION_LENGTH = 6
+SUMMARY_SAMPLE_ROWS = 5
+RECENT_TABLE_TURNS = 3
+MAX_REFERENCED_TABLES = 5
+
+# Pandas dtypes for BigQuery result columns; anything else keeps pandas' inference.
+BIGQUERY_DTYPES = {
+    "INT64": "Int64",
+    "INTEGER": "Int64",
+    "FLOAT64": "float64",
+    "FLOAT": "float64",
+    "BOOL": "boolean",
+    "BOOLEAN": "boolean",
+    "TIMESTAMP": "datetime64[ns, UTC]",
+}
+
+# Fully qualified BigQuery table references (project.dataset.table), either
+# backticked or directly after FROM/JOIN. Other dotted tokens are usually struct
+# paths (t.address.city) or version numbers, not tables.
+_TABLE_REFERENCE_RE = re.compile(
+    r"`([a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+)`"
+    r"|\b(?:FROM|JOIN)\s+([a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+)(?![a-zA-Z0-9_.-])",
+    re.IGNORECASE,
+)
+
+# Start of the "sql" string value in a (possibly partial) plan JSON document.
+_SQL_FIELD_RE = re.compile(r'"sql"\s*:\s*"')
+
+# Matches an explicit "LIMIT <n>" or "LIMIT @param" clause without flagging
+# identifiers such as rate_limit.
+_LIMIT_RE = re.compile(r"\blimit\s+(?:\d+\b|@\w+)", re.IGNORECASE)
+
+# Quoted strings, quoted identifiers and comments, which may mention LIMIT
+# without applying one.
+_SQL_QUOTED_RE = re.compile(
+    r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|--[^\n]*|/\*.*?\*/", re.DOTALL
+)
 
 DEFAULT_PROVIDER_NAME = os.getenv("LLM_PROVIDER", LLMProvider.OPENAI.value)
 try:
@@ -100,42 +155,147 @@ def normalise_base_url(url: str) -> str:
     return url
 
 
-def parse_json_response(raw_text: str) -> Dict[str, Any]:
-    """Parse JSON from an LLM response, recovering from light formatting."""
+def to_prompt_json(payload: Any) -> str:
+    """Serialise a prompt payload compactly; indentation only costs tokens."""
+    return json.dumps(payload, separators=(",", ":"))
+
+
+def _json_default(value: Any) -> Any:
+    """Convert NumPy scalars and timestamps that the stdlib encoder rejects."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def format_stats_json(stats: Dict[str, Any]) -> str:
+    """Serialise query statistics for display without pre-converting their values."""
+    return json.dumps(stats, indent=2, default=_json_default)
+
+
+def hash_payload(payload: Any) -> str:
+    """Return a stable digest of a JSON-compatible payload for use as a cache key."""
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def cache_lookup(cache: Optional[MutableMapping[str, Any]], key: str) -> Any:
+    """Return a cached value and mark it as most recently used, or None on a miss."""
+    if cache is None or key not in cache:
+        return None
+    value = cache.pop(key)
+    cache[key] = value
+    return value
+
+
+def cache_store(
+    cache: Optional[MutableMapping[str, Any]],
+    key: str,
+    value: Any,
+    max_entries: int = TURN_CACHE_MAX_ENTRIES,
+) -> None:
+    """Insert a value, evicting the least recently used entries beyond max_entries."""
+    if cache is None:
+        return
+    cache.pop(key, None)
+    cache[key] = value
+    while len(cache) > max_entries:
+        cache.pop(next(iter(cache)))
+
+
+def cache_stream_text(
+    stream: Iterator[str], cache: Optional[MutableMapping[str, Any]], key: str
+) -> Iterator[str]:
+    """Pass a text stream through, caching the full text once it is exhausted.
+
+    A stream that produced no text is not cached, so the next identical request
+    asks again instead of replaying a blank answer.
+    """
+    parts: List[str] = []
+    for chunk in stream:
+        parts.append(chunk)
+        yield chunk
+    if text := "".join(parts).strip():
+        cache_store(cache, key, text)
+
+
+def written_text(written: Any) -> str:
+    """Return the text st.write_stream wrote; it returns a list for empty or mixed streams."""
+    if isinstance(written, str):
+        return written.strip()
+    return "".join(item for item in written or [] if isinstance(item, str)).strip()
+
+
+def parse_json_response(raw_text: str, strict: bool = False) -> Dict[str, Any]:
+    """Parse JSON from an LLM response, recovering from light formatting unless strict."""
     raw_text = (raw_text or "").strip()
     if not raw_text:
         raise ValueError("Empty response from LLM")
 
     try:
-        return json.loads(raw_text)
+        parsed = json.loads(raw_text)
     except json.JSONDecodeError:
-        pass
-
-    # Attempt to recover by extracting the first JSON object or array
+        parsed = None
+    if isinstance(parsed, dict):
+        return parsed
+    if strict:
+        raise ValueError("LLM response was not valid JSON")
+
+    # Attempt to recover by decoding the first JSON object and ignoring any
+    # surrounding prose, which may itself contain braces.
+    decoder = json.JSONDecoder()
     start = raw_text.find("{")
-    end = raw_text.rfind("}")
-    if start != -1 and end != -1 and end > start:
+    while start != -1:
         try:
-            return json.loads(raw_text[start : end + 1])
+            parsed, _ = decoder.raw_decode(raw_text, start)
         except json.JSONDecodeError:
             pass
+        else:
+            if isinstance(parsed, dict):
+                return parsed
+        start = raw_text.find("{", start + 1)
 
     raise ValueError("LLM response was not valid JSON")
 
 
+def extract_streamed_sql(partial_json: str) -> Optional[str]:
+    """Return the plan's "sql" value once it has been fully received, else None."""
+    match = _SQL_FIELD_RE.search(partial_json)
+    if not match:
+        return None
+    try:
+        value, _ = json.JSONDecoder().raw_decode(partial_json, match.end() - 1)
+    except json.JSONDecodeError:
+        # The string is still being generated.
+        return None
+    return value if isinstance(value, str) else None
+
+
 def ensure_limit_clause(sql: str, row_limit: int) -> str:
     """Ensure the SQL query contains a LIMIT clause to control costs."""
     if row_limit <= 0:
         return sql
 
-    lower_sql = sql.lower()
-    if "limit" in lower_sql:
+    if _LIMIT_RE.search(_SQL_QUOTED_RE.sub(" ", sql)):
         return sql
 
-    trimmed = sql.rstrip().rstrip(";")
+    trimmed = sql.rstrip().rstrip(";").rstrip()
     return f"{trimmed}\nLIMIT {row_limit};"
 
 
+@st.cache_resource(show_spinner=False)
+def get_mcp_client(base_url: str) -> MCPTools:
+    """Return one MCPTools client per base URL so its connection pool survives reruns."""
+    return MCPTools(base_url=base_url)
+
+
+@st.cache_resource(show_spinner=False)
+def get_summary_executor() -> ThreadPoolExecutor:
+    """Worker pool for running-summary refreshes; nothing else is queued on it."""
+    return ThreadPoolExecutor(max_workers=MAX_SUMMARY_WORKERS, thread_name_prefix="mcp-summary")
+
+
 def load_table_schema(client: MCPTools, dataset_id: str, table_id: str) -> Dict[str, Any]:
     """Retrieve schema metadata for a table, handling API errors gracefully."""
     try:
@@ -149,15 +309,327 @@ def load_table_schema(client: MCPTools, dataset_id: str, table_id: str) -> Dict[
     schema = response.get("schema", [])
     column_docs = response.get("column_documentation")
     if column_docs:
-        # Merge documentation into schema entries when possible
-        doc_map = {doc.get("column_name"): doc for doc in column_docs}
-        for column in schema:
-            column_name = column.get("name")
-            if column_name in doc_map:
-                column["documentation"] = doc_map[column_name]
+        # Merge documentation into schema entries when possible. Small doc lists are
+        # scanned directly; larger ones get a lookup table to keep the merge linear.
+        if len(column_docs) <= SMALL_COLUMN_DOCS_LIMIT:
+            for column in schema:
+                column_name = column.get("name")
+                doc = next((d for d in column_docs if d.get("column_name") == column_name), None)
+                if doc is not None:
+                    column["documentation"] = doc
+        else:
+            doc_map = {doc.get("column_name"): doc for doc in column_docs}
+            for column in schema:
+                doc = doc_map.get(column.get("name"))
+                if doc is not None:
+                    column["documentation"] = doc
     return {"schema": schema, "metadata": {k: v for k, v in response.items() if k not in {"schema", "column_documentation"}}}
 
 
+SchemaKey = tuple[str, str, str]
+SchemaEntry = tuple[float, Optional[Dict[str, Any]], Optional[str]]
+
+
+@dataclass
+class SchemaStore:
+    """Schemas and failed lookups keyed by (base_url, dataset, table), least recently used first.
+
+    Unlike st.cache_data this can be checked without fetching, and failed lookups
+    are remembered (for a shorter time) so missing tables are not requested again
+    on every rerun. Sessions share the cached schemas; treat them as read-only.
+    """
+
+    entries: "OrderedDict[SchemaKey, SchemaEntry]" = field(default_factory=OrderedDict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def get(self, key: SchemaKey) -> Optional[tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """Return a fresh (schema, error) pair, or None if absent or expired."""
+        with self.lock:
+            entry = cache_lookup(self.entries, key)
+            if entry is None:
+                return None
+            loaded_at, schema, error = entry
+            ttl = SCHEMA_CACHE_TTL_SECONDS if error is None else SCHEMA_ERROR_TTL_SECONDS
+            if time.monotonic() - loaded_at > ttl:
+                del self.entries[key]
+                return None
+        return schema, error
+
+    def put(self, key: SchemaKey, schema: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        """Record a lookup, evicting the least recently used entries beyond the cap."""
+        with self.lock:
+            cache_store(self.entries, key, (time.monotonic(), schema, error), SCHEMA_CACHE_MAX_ENTRIES)
+
+
+@st.cache_resource(show_spinner=False)
+def get_schema_store() -> SchemaStore:
+    """The schema cache shared by every session in this process."""
+    return SchemaStore()
+
+
+@st.cache_resource(show_spinner=False)
+def get_schema_executor() -> ThreadPoolExecutor:
+    """Worker pool for schema lookups, reused across reruns and sessions."""
+    return ThreadPoolExecutor(max_workers=MAX_SCHEMA_WORKERS, thread_name_prefix="mcp-schema")
+
+
+@st.cache_data(ttl=DATASET_CACHE_TTL_SECONDS, show_spinner=False)
+def load_dataset_ids_cached(base_url: str) -> List[str]:
+    """List dataset ids, cached briefly so reruns do not hit the MCP server each time."""
+    response = get_mcp_client(base_url).get_datasets()
+    if "error" in response:
+        raise RuntimeError(response.get("error"))
+    return [item.get("dataset_id") for item in response.get("datasets", []) if item.get("dataset_id")]
+
+
+@st.cache_data(ttl=SCHEMA_CACHE_TTL_SECONDS, show_spinner=False)
+def load_table_ids_cached(base_url: str, dataset_id: str) -> List[str]:
+    """List table ids for a dataset, cached across reruns. Errors are raised, not cached."""
+    response = get_mcp_client(base_url).get_tables(dataset_id)
+    if "error" in response:
+        raise RuntimeError(response.get("error"))
+    return [item.get("table_id") for item in response.get("tables", []) if item.get("table_id")]
+
+
+def load_table_schemas_parallel(
+    client: MCPTools,
+    dataset_id: str,
+    table_ids: List[str],
+) -> tuple[Dict[str, Any], Dict[str, str]]:
+    """Fetch several table schemas, concurrently for those not already cached.
+
+    Returns the loaded schemas and an error message for each table that failed.
+    Errors are returned rather than displayed because Streamlit elements must be
+    created from the script thread.
+    """
+    store = get_schema_store()
+    results: Dict[str, tuple[Optional[Dict[str, Any]], Optional[str]]] = {}
+    pending: List[str] = []
+    for table_id in table_ids:
+        if (cached := store.get((client.base_url, dataset_id, table_id))) is not None:
+            results[table_id] = cached
+        elif table_id not in pending:
+            pending.append(table_id)
+
+    # The common rerun case has every schema cached and skips the pool entirely.
+    if pending:
+        def fetch(table_id: str) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
+            try:
+                schema, error = load_table_schema(client, dataset_id, table_id), None
+            except RuntimeError as exc:
+                schema, error = None, str(exc)
+            store.put((client.base_url, dataset_id, table_id), schema, error)
+            return schema, error
+
+        if len(pending) == 1:
+            results[pending[0]] = fetch(pending[0])
+        else:
+            results.update(zip(pending, get_schema_executor().map(fetch, pending)))
+
+    schemas: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    for table_id in table_ids:
+        schema, error = results[table_id]
+        if error is not None:
+            errors[table_id] = error
+        else:
+            schemas[table_id] = schema
+    return schemas, errors
+
+
+def find_table_references(text: Any) -> List[str]:
+    """Return project.dataset.table references in text, skipping INFORMATION_SCHEMA views.
+
+    Project ids start with a letter, which rules out numeric tokens such as 1.2.3.
+    """
+    references = []
+    for backticked, unquoted in _TABLE_REFERENCE_RE.findall(str(text or "")):
+        reference = backticked or unquoted
+        if not reference[0].isalpha() or reference.rsplit(".", 1)[-1].upper() == "INFORMATION_SCHEMA":
+            continue
+        references.append(reference)
+    return references
+
+
+def index_table_references(
+    table_refs: "OrderedDict[str, int]", message: Dict[str, Any], turn_index: int
+) -> None:
+    """Record the tables a new conversation message mentions, most recent last."""
+    text = message.get("sql") if message.get("role") == "assistant" else message.get("content")
+    for reference in find_table_references(text):
+        table_refs[reference] = turn_index
+        table_refs.move_to_end(reference)
+
+
+def build_table_reference_index(
+    conversation_history: Optional[List[Dict[str, Any]]],
+) -> "OrderedDict[str, int]":
+    """Index every table mentioned in a conversation by the turn that last mentioned it."""
+    table_refs: "OrderedDict[str, int]" = OrderedDict()
+    for turn_index, msg in enumerate(conversation_history or []):
+        index_table_references(table_refs, msg, turn_index)
+    return table_refs
+
+
+def recent_table_references(
+    question: str,
+    table_refs: "OrderedDict[str, int]",
+    since_turn: int,
+) -> List[str]:
+    """Tables mentioned in the question and in turns from since_turn on, most recent first."""
+    references = find_table_references(question)
+    for reference, turn_index in reversed(table_refs.items()):
+        if turn_index < since_turn:
+            break
+        if reference not in references:
+            references.append(reference)
+    return references
+
+
+def load_referenced_table_schemas(client: MCPTools, references: List[str]) -> Dict[str, Any]:
+    """Fetch schemas for project.dataset.table references, keyed by the full reference.
+
+    The MCP server looks tables up in its own project, so callers should only pass
+    references to datasets it lists. Failed lookups are cached like any other
+    schema and otherwise ignored.
+    """
+    tables_by_dataset: Dict[str, List[str]] = {}
+    for reference in references:
+        _, dataset_id, table_id = reference.split(".")
+        tables_by_dataset.setdefault(dataset_id, []).append(table_id)
+
+    loaded: Dict[tuple[str, str], Any] = {}
+    for dataset_id, table_ids in tables_by_dataset.items():
+        dataset_schemas, _ = load_table_schemas_parallel(client, dataset_id, table_ids)
+        for table_id, schema in dataset_schemas.items():
+            loaded[dataset_id, table_id] = schema
+
+    schemas: Dict[str, Any] = {}
+    for reference in references:
+        _, dataset_id, table_id = reference.split(".")
+        if (dataset_id, table_id) in loaded:
+            schemas[reference] = loaded[dataset_id, table_id]
+    return schemas
+
+
+def rows_to_dataframe(
+    rows: List[Dict[str, Any]], column_types: Optional[Dict[str, str]] = None
+) -> pd.DataFrame:
+    """Build a DataFrame from result rows, applying BigQuery column types when known."""
+    if not rows:
+        return pd.DataFrame()
+
+    df = pd.DataFrame.from_records(rows, columns=list(rows[0].keys()))
+    for column, bigquery_type in (column_types or {}).items():
+        dtype = BIGQUERY_DTYPES.get(str(bigquery_type).upper())
+        if dtype is None or column not in df.columns:
+            continue
+        try:
+            if dtype.startswith("datetime64"):
+                df[column] = pd.to_datetime(df[column], utc=True)
+            else:
+                df[column] = df[column].astype(dtype)
+        except (TypeError, ValueError):
+            # Leave columns whose values do not match the declared type as inferred.
+            continue
+    return df
+
+
+def build_preview_table(
+    rows: List[Dict[str, Any]], column_types: Optional[Dict[str, str]] = None
+) -> Any:
+    """Convert preview rows to an Arrow table, or a DataFrame when Arrow cannot type them."""
+    df = rows_to_dataframe(rows, column_types)
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowException, TypeError, ValueError):
+        return df
+
+
+def build_summary_context(
+    rows: List[Dict[str, Any]],
+    column_types: Optional[Dict[str, str]] = None,
+    sample_rows: int = SUMMARY_SAMPLE_ROWS,
+) -> Dict[str, Any]:
+    """Condense result rows into the head, tail and column statistics sent to the LLM."""
+    if len(rows) <= 2 * sample_rows:
+        return {"row_count": len(rows), "rows": rows}
+
+    df = rows_to_dataframe(rows, column_types)
+    try:
+        description = df.describe(include="all")
+    except TypeError:
+        # Nested (ARRAY/STRUCT) values are unhashable; describe the numeric columns only.
+        description = df.describe()
+    return {
+        "row_count": len(rows),
+        "head": rows[:sample_rows],
+        "tail": rows[-sample_rows:],
+        "column_stats": json.loads(description.to_json(date_format="iso")),
+    }
+
+
+def compute_preview_stats(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Compute count, null share, min and max for every numeric column of a result."""
+    numeric = df.select_dtypes(include="number")
+    if numeric.empty:
+        return {}
+
+    # One vectorised pass over a float64 matrix instead of per-column Python loops.
+    values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+    present = ~np.isnan(values)
+    counts = present.sum(axis=0)
+    minimums = np.where(present, values, np.inf).min(axis=0)
+    maximums = np.where(present, values, -np.inf).max(axis=0)
+
+    total_rows = len(values)
+    stats: Dict[str, Dict[str, Any]] = {}
+    for index, column in enumerate(numeric.columns):
+        count = int(counts[index])
+        stats[str(column)] = {
+            "count": count,
+            "null_pct": round(100 * (total_rows - count) / total_rows, 2),
+            "min": float(minimums[index]) if count else None,
+            "max": float(maximums[index]) if count else None,
+        }
+    return stats
+
+
+def write_csv_chunks(rows: List[Dict[str, Any]], chunk_size: int = CSV_CHUNK_ROWS) -> bytes:
+    """Serialise rows to CSV bytes in Arrow batches, spooling large outputs to disk."""
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=CSV_SPOOL_MAX_BYTES) as spool:
+            schema = None
+            writer = None
+            try:
+                for start in range(0, len(rows), chunk_size):
+                    table = pa.Table.from_pylist(rows[start : start + chunk_size], schema=schema)
+                    if writer is None:
+                        schema = table.schema
+                        writer = pacsv.CSVWriter(spool, schema)
+                    writer.write_table(table)
+            finally:
+                if writer is not None:
+                    writer.close()
+            spool.seek(0)
+            return spool.read()
+    except pa.ArrowException:
+        # Nested (ARRAY/STRUCT) values or columns whose type changes between
+        # batches are not supported by the Arrow CSV writer.
+        return pd.DataFrame(rows).to_csv(index=False).encode("utf-8")
+
+
+def write_parquet_bytes(rows: List[Dict[str, Any]]) -> Optional[bytes]:
+    """Serialise rows to compressed Parquet bytes, or None when Arrow cannot type them."""
+    try:
+        table = pa.Table.from_pylist(rows)
+        buffer = pa.BufferOutputStream()
+        pq.write_table(table, buffer, compression="zstd")
+        return buffer.getvalue().to_pybytes()
+    except pa.ArrowException:
+        return None
+
+
 def build_metadata_payload(
     available_datasets: List[str],
     selected_dataset: Optional[str],
@@ -188,11 +660,15 @@ def initialise_llm_client(provider: LLMProvider, api_key: str) -> Optional[LLMCl
     if not api_key:
         return None
 
+    # Provider SDKs are imported on first use so loading the app doesn't pull
+    # in every installed SDK.
     if provider is LLMProvider.OPENAI:
-        if OpenAI is None:
+        try:
+            from openai import OpenAI
+        except ImportError as exc:  # pragma: no cover - dependency guard
             raise RuntimeError(
                 "OpenAI client library is not installed. Please add the 'openai' dependency."
-            )
+            ) from exc
         return LLMClientWrapper(provider=provider, client=OpenAI(api_key=api_key))
 
     if provider is LLMProvider.ANTHROPIC:
@@ -218,6 +694,12 @@ def initialise_llm_client(provider: LLMProvider, api_key: str) -> Optional[LLMCl
     raise RuntimeError(f"Unsupported LLM provider: {provider}")
 
 
+@st.cache_resource(show_spinner=False)
+def get_llm_client(provider: LLMProvider, api_key: str) -> Optional[LLMClientWrapper]:
+    """Reuse one SDK client (and its HTTP connection pool) per provider and key across reruns."""
+    return initialise_llm_client(provider, api_key)
+
+
 def _convert_to_gemini_schema(json_schema: Dict[str, Any], types_module: Any) -> Any:
     """
     Convert JSON Schema to Gemini Schema format.
@@ -279,6 +761,18 @@ def _convert_to_gemini_schema(json_schema: Dict[str, Any], types_module: Any) ->
     )
 
 
+def openai_response_format(response_schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the OpenAI Structured Outputs response_format for a JSON schema."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "sql_generation_response",
+            "strict": True,
+            "schema": response_schema,
+        },
+    }
+
+
 def invoke_llm(
     llm_client: LLMClientWrapper,
     model: str,
@@ -312,14 +806,7 @@ def invoke_llm(
 
         if response_schema:
             # Use JSON mode with schema for structured output
-            create_kwargs["response_format"] = {
-                "type": "json_schema",
-                "json_schema": {
-                    "name": "sql_generation_response",
-                    "strict": True,
-                    "schema": response_schema,
-                },
-            }
+            create_kwargs["response_format"] = openai_response_format(response_schema)
 
         response = llm_client.client.chat.completions.create(**create_kwargs)
         if not response.choices:
@@ -473,6 +960,54 @@ def invoke_llm(
     raise RuntimeError(f"Unsupported LLM provider: {provider}")
 
 
+def stream_llm(
+    llm_client: LLMClientWrapper,
+    model: str,
+    messages: List[Dict[str, Any]],
+    temperature: float,
+    response_schema: Optional[Dict[str, Any]] = None,
+) -> Iterator[str]:
+    """
+    Invoke an LLM and iterate over the response text as it is generated.
+
+    OpenAI responses are streamed chunk by chunk. Other providers use the
+    non-streaming invoke_llm path and yield the full response at once.
+
+    Args:
+        llm_client: Wrapped LLM client
+        model: Model name to use
+        messages: List of message dicts with 'role' and 'content'
+        temperature: Sampling temperature
+        response_schema: Optional JSON schema for structured output
+
+    Returns:
+        Iterator over text chunks of the response
+    """
+    if llm_client.provider is LLMProvider.OPENAI:
+        create_kwargs: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True,
+        }
+        if response_schema:
+            create_kwargs["response_format"] = openai_response_format(response_schema)
+
+        # The request is sent here so connection errors surface to the caller;
+        # the returned generator only reads the already-open stream.
+        response = llm_client.client.chat.completions.create(**create_kwargs)
+        return (chunk.choices[0].delta.content or "" for chunk in response if chunk.choices)
+
+    content = invoke_llm(
+        llm_client=llm_client,
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        response_schema=response_schema,
+    )
+    return iter([content])
+
+
 def generate_sql_plan(
     llm_client: LLMClientWrapper,
     model: str,
@@ -480,6 +1015,8 @@ def generate_sql_plan(
     metadata: Dict[str, Any],
     row_limit: int,
     conversation_history: Optional[List[Dict[str, Any]]] = None,
+    history_summary: Optional[str] = None,
+    on_sql: Optional[Callable[[str], None]] = None,
 ) -> Dict[str, Any]:
     prompt_payload = {
         "question": question,
@@ -521,26 +1058,38 @@ def generate_sql_plan(
     ]
 
     # Add conversation history for context, but limit to recent messages to avoid token limits
-    if conversation_history:
+    recent_history: List[Dict[str, Any]] = []
+    if history_summary:
+        # The running summary already covers earlier turns, so only the previous
+        # user turn is sent verbatim. This keeps the prompt size flat as the chat grows.
+        messages.append(
+            {"role": "user", "content": f"Summary of the conversation so far:\n{history_summary}"}
+        )
+        recent_history = [
+            msg
+            for msg in conversation_history or []
+            if msg.get("role") == "user" and msg.get("content") != question
+        ][-1:]
+    elif conversation_history:
         # Include the last 6 messages (3 exchanges) for context
         recent_history = conversation_history[-6:]
-        for msg in recent_history:
-            role = msg.get("role")
-            if role == "user":
-                messages.append({"role": "user", "content": msg.get("content", "")})
-            elif role == "assistant":
-                # For assistant messages, include the question context and SQL
-                assistant_context = []
-                if sql := msg.get("sql"):
-                    assistant_context.append(f"Generated SQL:\n{sql}")
-                if analysis := msg.get("analysis_steps"):
-                    if isinstance(analysis, list):
-                        assistant_context.append("Analysis: " + ", ".join(str(s) for s in analysis))
-                if assistant_context:
-                    messages.append({"role": "assistant", "content": "\n\n".join(assistant_context)})
+    for msg in recent_history:
+        role = msg.get("role")
+        if role == "user":
+            messages.append({"role": "user", "content": msg.get("content", "")})
+        elif role == "assistant":
+            # For assistant messages, include the question context and SQL
+            assistant_context = []
+            if sql := msg.get("sql"):
+                assistant_context.append(f"Generated SQL:\n{sql}")
+            if analysis := msg.get("analysis_steps"):
+                if isinstance(analysis, list):
+                    assistant_context.append("Analysis: " + ", ".join(str(s) for s in analysis))
+            if assistant_context:
+                messages.append({"role": "assistant", "content": "\n\n".join(assistant_context)})
 
     # Add current question with metadata
-    messages.append({"role": "user", "content": json.dumps(prompt_payload, indent=2)})
+    messages.append({"role": "user", "content": to_prompt_json(prompt_payload)})
 
     # Define JSON schema for structured output
     # Note: "sql" is not in required list to allow flexibility across providers
@@ -576,15 +1125,73 @@ def generate_sql_plan(
         "additionalProperties": False
     }
 
-    # Use the provider-agnostic invoke_llm helper with structured output
-    content = invoke_llm(
+    # OpenAI Structured Outputs guarantee schema-valid JSON, so there is nothing to
+    # recover from; other providers may still wrap the object in prose.
+    strict_json = llm_client.provider is LLMProvider.OPENAI
+
+    if on_sql is None:
+        # Use the provider-agnostic invoke_llm helper with structured output
+        content = invoke_llm(
+            llm_client=llm_client,
+            model=model,
+            messages=messages,
+            temperature=0.1,
+            response_schema=response_schema,
+        )
+        return parse_json_response(content, strict=strict_json)
+
+    # "sql" is the first schema property, so it is complete long before the
+    # remaining fields; hand it over as soon as it closes.
+    content = ""
+    sql_sent = False
+    for chunk in stream_llm(
         llm_client=llm_client,
         model=model,
         messages=messages,
         temperature=0.1,
         response_schema=response_schema,
+    ):
+        content += chunk
+        if not sql_sent and (streamed_sql := extract_streamed_sql(content)):
+            sql_sent = True
+            on_sql(streamed_sql)
+    return parse_json_response(content, strict=strict_json)
+
+
+def update_history_summary(
+    llm_client: LLMClientWrapper,
+    model: str,
+    previous_summary: str,
+    question: str,
+    sql: str,
+) -> str:
+    """Fold the latest question and SQL into the running conversation summary."""
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "You maintain a running summary of a data analysis conversation."
+                " Preserve fully qualified table references (project.dataset.table),"
+                " filters, date ranges and the user's intent. Drop pleasantries."
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                f"Previous summary: {previous_summary or '(none)'}.\n"
+                f"New turn: Q={question}, SQL={sql}.\n"
+                f"Return a <={HISTORY_SUMMARY_MAX_TOKENS} token summary."
+            ),
+        },
+    ]
+
+    content = invoke_llm(
+        llm_client=llm_client,
+        model=model,
+        messages=messages,
+        temperature=0.0,
     )
-    return parse_json_response(content)
+    return content.strip()
 
 
 def basic_summary(question: str, result_preview: List[Dict[str, Any]]) -> str:
@@ -609,15 +1216,15 @@ def generate_summary(
     model: str,
     question: str,
     sql: str,
-    result_preview: List[Dict[str, Any]],
+    result_context: Dict[str, Any],
     statistics: Dict[str, Any],
     cached: bool,
     plan: Dict[str, Any],
-) -> str:
+) -> Iterator[str]:
     payload = {
         "question": question,
         "sql": sql,
-        "result_preview": result_preview,
+        "result": result_context,
         "statistics": statistics,
         "cached": cached,
         "plan": plan,
@@ -635,17 +1242,43 @@ def generate_summary(
         },
         {
             "role": "user",
-            "content": json.dumps(payload, indent=2),
+            "content": to_prompt_json(payload),
         },
     ]
 
-    content = invoke_llm(
+    return stream_llm(
         llm_client=llm_client,
         model=model,
         messages=messages,
         temperature=0.2,
     )
-    return content.strip()
+
+
+def find_repeated_answer(
+    question: str, conversation: List[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """Return a copy of the last answer when the question repeats the last user turn."""
+    if len(conversation) < 2:
+        return None
+    previous_question, previous_answer = conversation[-2], conversation[-1]
+    if previous_question.get("role") != "user" or previous_answer.get("role") != "assistant":
+        return None
+    if previous_answer.get("error"):
+        return None
+    if str(previous_question.get("content", "")).strip() != question.strip():
+        return None
+    return {key: value for key, value in previous_answer.items() if key != "message_key"}
+
+
+def run_query(client: MCPTools, config: AgentConfig, sql: str) -> Dict[str, Any]:
+    """Execute SQL through the MCP server with the configured billing and cache settings."""
+    return client.execute_bigquery_sql(
+        sql=sql,
+        maximum_bytes_billed=config.maximum_bytes_billed,
+        use_cache=config.use_cache,
+        user_id=config.user_id or None,
+        session_id=config.session_id or None,
+    )
 
 
 def process_question(
@@ -655,9 +1288,21 @@ def process_question(
     metadata: Dict[str, Any],
     llm_client: Optional[LLMClientWrapper],
     conversation_history: Optional[List[Dict[str, Any]]] = None,
+    history_summary: Optional[str] = None,
+    plan_cache: Optional[MutableMapping[str, Any]] = None,
+    summary_cache: Optional[MutableMapping[str, Any]] = None,
+    force_refresh: bool = False,
+    table_refs: Optional["OrderedDict[str, int]"] = None,
 ) -> Dict[str, Any]:
     plan: Dict[str, Any] = {}
 
+    # Skip the LLM round trip for empty prompts and trivially short opening questions.
+    is_follow_up = bool(history_summary) or any(
+        msg.get("role") == "assistant" and not msg.get("error") for msg in conversation_history or []
+    )
+    if len(question.strip()) < (1 if is_follow_up else MIN_QUESTION_LENGTH):
+        raise RuntimeError("Please ask a more specific question.")
+
     if not llm_client:
         raise RuntimeError(
             (
@@ -666,12 +1311,84 @@ def process_question(
             )
         )
 
-    try:
-        plan = generate_sql_plan(
-            llm_client, config.model, question, metadata, config.row_limit, conversation_history
-        )
-    except Exception as exc:
-        raise RuntimeError(f"Failed to generate SQL plan: {exc}") from exc
+    # Follow-ups often say "the table" about a table named in an earlier turn. Share
+    # those schemas with the planner; they come from the schema cache after the
+    # first lookup, so repeated follow-ups do not pay for another round trip.
+    if table_refs is None:
+        table_refs = build_table_reference_index(conversation_history)
+    since_turn = len(conversation_history or []) - 2 * RECENT_TABLE_TURNS
+    selected_dataset = metadata.get("selected_dataset")
+    known_tables = {f"{selected_dataset}.{table_id}" for table_id in metadata.get("table_schemas") or {}}
+    available_datasets = set(metadata.get("available_datasets") or [])
+    referenced_tables = [
+        reference
+        for reference in recent_table_references(question, table_refs, since_turn)
+        if reference.split(".", 1)[1] not in known_tables
+        and reference.split(".")[1] in available_datasets
+    ][:MAX_REFERENCED_TABLES]
+    if referenced_tables:
+        referenced_schemas = load_referenced_table_schemas(client, referenced_tables)
+        if referenced_schemas:
+            metadata = {**metadata, "referenced_table_schemas": referenced_schemas}
+
+    # Identical questions asked in the same context reuse the previous plan.
+    plan_key = hash_payload(
+        {
+            "provider": config.provider.value,
+            "model": config.model,
+            "question": question,
+            "metadata": metadata,
+            "row_limit": config.row_limit,
+            "context": history_summary
+            or [
+                {"role": msg.get("role"), "content": msg.get("content"), "sql": msg.get("sql")}
+                for msg in (conversation_history or [])[-6:]
+            ],
+        }
+    )
+    # SQL started while the rest of the plan is still streaming, keyed by the
+    # limited SQL so it is only reused if the final plan agrees.
+    early_queries: Dict[str, Future] = {}
+    streamed_sqls: List[str] = []
+
+    def start_query(streamed_sql: str) -> None:
+        streamed_sqls.append(streamed_sql)
+        early_sql = ensure_limit_clause(streamed_sql, config.row_limit)
+        # A thread of its own, so the query never waits behind other sessions' work.
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mcp-early-query")
+        early_queries[early_sql] = executor.submit(run_query, client, config, early_sql)
+        executor.shutdown(wait=False)
+
+    # A new plan is only cached once its query has succeeded; otherwise retrying the
+    # same question would replay the failing plan without asking the LLM again.
+    cached_plan = None if force_refresh else cache_lookup(plan_cache, plan_key)
+    cache_new_plan = False
+    if cached_plan is not None:
+        plan = cached_plan
+    else:
+        try:
+            plan = generate_sql_plan(
+                llm_client,
+                config.model,
+                question,
+                metadata,
+                config.row_limit,
+                conversation_history,
+                history_summary,
+                on_sql=start_query,
+            )
+        except Exception as exc:
+            if not streamed_sqls:
+                raise RuntimeError(f"Failed to generate SQL plan: {exc}") from exc
+            # The SQL arrived, and its query is already running (and billed), before
+            # the rest of the plan failed; answer with it instead of discarding it.
+            # The partial plan is not cached.
+            plan = {
+                "sql": streamed_sqls[0],
+                "assumptions": [f"The rest of the analysis plan could not be read: {exc}"],
+            }
+        else:
+            cache_new_plan = True
 
     sql = plan.get("sql")
     if not sql:
@@ -683,25 +1400,50 @@ def process_question(
 
     sql_with_limit = ensure_limit_clause(sql, config.row_limit)
 
-    try:
-        raw_response = client.execute_bigquery_sql(
-            sql=sql_with_limit,
-            maximum_bytes_billed=config.maximum_bytes_billed,
-            use_cache=config.use_cache,
-            user_id=config.user_id or None,
-            session_id=config.session_id or None,
-        )
-    except RequestException as exc:
-        raise RuntimeError(handle_mcp_error(exc)) from exc
+    # The running summary only needs the question and SQL, so refresh it in the
+    # background while the query executes and the result summary is generated.
+    history_future = get_summary_executor().submit(
+        update_history_summary,
+        llm_client,
+        config.model,
+        history_summary or "",
+        question,
+        sql_with_limit,
+    )
 
-    query_result = QueryResult.from_mcp_response(raw_response)
-    if query_result.is_error:
-        raise RuntimeError(query_result.error or "Unknown error executing query.")
+    try:
+        try:
+            if early_query := early_queries.get(sql_with_limit):
+                raw_response = early_query.result()
+            else:
+                raw_response = run_query(client, config, sql_with_limit)
+        except RequestException as exc:
+            raise RuntimeError(handle_mcp_error(exc)) from exc
+
+        query_result = QueryResult.from_mcp_response(raw_response)
+        if query_result.is_error:
+            raise RuntimeError(query_result.error or "Unknown error executing query.")
+    except BaseException:
+        # A failed turn is not added to the history, so its summary refresh is not
+        # wanted. This only helps while it is still queued; a running call finishes.
+        history_future.cancel()
+        # A cached plan that stopped working (e.g. its table was dropped) is dropped too.
+        if plan_cache is not None:
+            plan_cache.pop(plan_key, None)
+        raise
+    if cache_new_plan:
+        cache_store(plan_cache, plan_key, plan)
 
     full_rows = query_result.result or []
     preview_rows = full_rows[:RESULT_PREVIEW_ROWS]
     downloadable_rows = full_rows[:RESULT_DOWNLOAD_ROWS]
 
+    column_types = {
+        column["name"]: column["type"]
+        for column in query_result.schema
+        if column.get("name") and column.get("type")
+    }
+
     statistics = {
         "totalRows": query_result.statistics.totalRows,
         "totalBytesProcessed": query_result.statistics.totalBytesProcessed,
@@ -711,25 +1453,48 @@ def process_question(
         "cached_at": query_result.cached_at,
     }
 
-    summary_text = basic_summary(question, preview_rows)
-    if llm_client:
+    fallback_summary = basic_summary(question, preview_rows)
+    summary_text = fallback_summary
+    summary_stream: Optional[Iterator[str]] = None
+    # The LLM only sees a head/tail sample plus column statistics; the full
+    # preview is kept for the UI.
+    summary_context = build_summary_context(preview_rows, column_types)
+    summary_key = hash_payload(
+        {
+            "provider": config.provider.value,
+            "model": config.model,
+            "question": question,
+            "sql": sql_with_limit,
+            "result": summary_context,
+            "cached": query_result.cached,
+        }
+    )
+    cached_summary = None if force_refresh else cache_lookup(summary_cache, summary_key)
+    if cached_summary:
+        summary_stream = iter([cached_summary])
+    elif llm_client:
         try:
-            summary_text = generate_summary(
-                llm_client=llm_client,
-                model=config.model,
-                question=question,
-                sql=sql_with_limit,
-                result_preview=preview_rows,
-                statistics=statistics,
-                cached=query_result.cached,
-                plan=plan,
+            summary_stream = cache_stream_text(
+                generate_summary(
+                    llm_client=llm_client,
+                    model=config.model,
+                    question=question,
+                    sql=sql_with_limit,
+                    result_context=summary_context,
+                    statistics=statistics,
+                    cached=query_result.cached,
+                    plan=plan,
+                ),
+                summary_cache,
+                summary_key,
             )
         except Exception as exc:  # pragma: no cover - UI feedback
-            summary_text = basic_summary(question, preview_rows) + f"\n\nLLM summary failed: {exc}"
+            summary_text = f"{fallback_summary}\n\nLLM summary failed: {exc}"
 
     return {
         "role": "assistant",
         "content": summary_text,
+        "content_stream": summary_stream,
         "sql": sql_with_limit,
         "analysis_steps": plan.get("analysis_steps"),
         "assumptions": plan.get("assumptions"),
@@ -739,7 +1504,13 @@ def process_question(
         "cached": query_result.cached,
         "preview_rows": preview_rows,
         "download_rows": downloadable_rows,
+        "column_types": column_types,
+        # Shown beside the preview table, so computed over the same rows.
+        "preview_stats": compute_preview_stats(rows_to_dataframe(preview_rows, column_types)),
+        "csv_bytes": write_csv_chunks(downloadable_rows) if downloadable_rows else None,
+        "parquet_bytes": write_parquet_bytes(downloadable_rows) if downloadable_rows else None,
         "has_more_rows": len(full_rows) > len(preview_rows),
+        "history_future": history_future,
     }
 
 
@@ -748,10 +1519,30 @@ def render_assistant_message(message: Dict[str, Any], key: Optional[str] = None)
         st.error(error)
         return
 
-    widget_key = key or str(id(message))
-    suffix_label = f" · run {widget_key}" if key else ""
+    suffix_label = f" · run {key}" if key else ""
+    # Widget keys must survive reruns so Streamlit keeps the download button (and its
+    # uploaded CSV) in place; id(message) changes whenever the message is re-created.
+    widget_key = key or message.setdefault(
+        "message_key", hash_payload({"sql": message.get("sql"), "content": message.get("content")})[:12]
+    )
 
-    st.markdown(message.get("content", ""))
+    # A fresh answer carries a live summary stream; render it progressively and
+    # keep the final text so later reruns render from the stored content.
+    if content_stream := message.pop("content_stream", None):
+        fallback_text = message.get("content", "")
+        try:
+            streamed_text = written_text(st.write_stream(content_stream))
+        except Exception as exc:  # pragma: no cover - UI feedback
+            message["content"] = f"{fallback_text}\n\nLLM summary failed: {exc}"
+            st.markdown(message["content"])
+        else:
+            if streamed_text:
+                message["content"] = streamed_text
+            else:
+                # The LLM streamed nothing; keep the basic summary rather than a blank answer.
+                st.markdown(fallback_text)
+    else:
+        st.markdown(message.get("content", ""))
 
     if message.get("analysis_steps"):
         steps = message["analysis_steps"]
@@ -790,25 +1581,52 @@ def render_assistant_message(message: Dict[str, Any], key: Optional[str] = None)
         col3.metric("Cached result", cached_label)
 
         with st.expander(f"Query statistics{suffix_label}"):
-            st.json(stats)
+            st.code(format_stats_json(stats), language="json")
 
     preview_rows = message.get("preview_rows") or []
     if preview_rows:
         st.subheader("Result preview")
-        df_preview = pd.DataFrame(preview_rows)
-        st.dataframe(df_preview, use_container_width=True)
+        # Streamlit ships tables to the browser as Arrow; convert once and keep the
+        # table on the message so reruns skip the pandas -> Arrow step.
+        preview_table = message.get("arrow_preview")
+        if preview_table is None:
+            preview_table = message["arrow_preview"] = build_preview_table(
+                preview_rows, message.get("column_types")
+            )
+        st.dataframe(preview_table, use_container_width=True, key=f"preview-{widget_key}")
+
+        if preview_stats := message.get("preview_stats"):
+            with st.expander(f"Column statistics{suffix_label}"):
+                st.dataframe(
+                    pd.DataFrame.from_dict(preview_stats, orient="index"),
+                    use_container_width=True,
+                )
 
         download_rows = message.get("download_rows") or []
         if download_rows:
-            df_download = pd.DataFrame(download_rows)
-            csv_bytes = df_download.to_csv(index=False).encode("utf-8")
-            st.download_button(
+            # Older messages predate the precomputed bytes; serialise once and keep them.
+            csv_bytes = message.get("csv_bytes")
+            if csv_bytes is None:
+                csv_bytes = message["csv_bytes"] = write_csv_chunks(download_rows)
+            if "parquet_bytes" not in message:
+                message["parquet_bytes"] = write_parquet_bytes(download_rows)
+            csv_column, parquet_column = st.columns(2)
+            csv_column.download_button(
                 label="Download results as CSV (preview)",
                 data=csv_bytes,
                 file_name="query_results.csv",
                 mime="text/csv",
                 key=f"download-{widget_key}",
             )
+            # Parquet is columnar and compressed, so the same rows ship far fewer bytes.
+            if parquet_bytes := message["parquet_bytes"]:
+                parquet_column.download_button(
+                    label="Download results as Parquet (preview)",
+                    data=parquet_bytes,
+                    file_name="query_results.parquet",
+                    mime="application/vnd.apache.parquet",
+                    key=f"download-parquet-{widget_key}",
+                )
 
         if message.get("has_more_rows"):
             st.info(
@@ -868,6 +1686,11 @@ base_url_input = st.sidebar.text_input(
 )
 
 use_cache = st.sidebar.checkbox("Use cached results when available", value=True)
+force_refresh = st.sidebar.checkbox(
+    "Force refresh AI answers",
+    value=False,
+    help="Ask the LLM again even if the same question was already answered in this session.",
+)
 row_limit = st.sidebar.slider("Default LIMIT for exploratory queries", 10, 1000, 200, step=10)
 maximum_bytes = st.sidebar.number_input(
     "Maximum bytes billed per query",
@@ -902,13 +1725,10 @@ agent_config = AgentConfig(
     provider=selected_provider,
 )
 
-client = MCPTools(base_url=agent_config.base_url)
+client = get_mcp_client(agent_config.base_url)
 
 try:
-    datasets_response = client.get_datasets()
-    if "error" in datasets_response:
-        raise RuntimeError(datasets_response.get("error"))
-    datasets = [item.get("dataset_id") for item in datasets_response.get("datasets", []) if item.get("dataset_id")]
+    datasets = load_dataset_ids_cached(client.base_url)
 except RequestException as exc:
     datasets = []
     st.sidebar.error(f"Failed to load datasets: {handle_mcp_error(exc)}")
@@ -932,10 +1752,7 @@ if datasets:
 
 if selected_dataset:
     try:
-        tables_response = client.get_tables(selected_dataset)
-        if "error" in tables_response:
-            raise RuntimeError(tables_response.get("error"))
-        table_options = [item.get("table_id") for item in tables_response.get("tables", []) if item.get("table_id")]
+        table_options = load_table_ids_cached(client.base_url, selected_dataset)
     except RequestException as exc:
         table_options = []
         st.sidebar.error(f"Failed to load tables: {handle_mcp_error(exc)}")
@@ -949,11 +1766,9 @@ if selected_dataset:
         help="Schemas for selected tables are shared with the LLM to improve SQL quality.",
     )
 
-    for table_id in selected_tables:
-        try:
-            table_schemas[table_id] = load_table_schema(client, selected_dataset, table_id)
-        except RuntimeError as exc:
-            st.sidebar.warning(f"Failed to load schema for {table_id}: {exc}")
+    table_schemas, schema_errors = load_table_schemas_parallel(client, selected_dataset, selected_tables)
+    for table_id, error in schema_errors.items():
+        st.sidebar.warning(f"Failed to load schema for {table_id}: {error}")
 else:
     if datasets:
         st.sidebar.info("Select a dataset to share schema context with the agent.")
@@ -964,7 +1779,7 @@ metadata_payload = build_metadata_payload(datasets, selected_dataset, table_sche
 llm_client_error: Optional[str] = None
 llm_client: Optional[LLMClientWrapper] = None
 try:
-    llm_client = initialise_llm_client(selected_provider, provider_api_key)
+    llm_client = get_llm_client(selected_provider, provider_api_key)
 except RuntimeError as exc:  # pragma: no cover - dependency guard
     llm_client_error = str(exc)
 
@@ -978,42 +1793,81 @@ elif llm_client is None:
 
 if "conversation" not in st.session_state:
     st.session_state["conversation"] = []
+if "history_summary" not in st.session_state:
+    st.session_state["history_summary"] = ""
+if "table_refs" not in st.session_state:
+    # Kept up to date on every append so lookups never rescan the conversation.
+    st.session_state["table_refs"] = build_table_reference_index(st.session_state["conversation"])
+if "plan_cache" not in st.session_state:
+    st.session_state["plan_cache"] = {}
+if "summary_cache" not in st.session_state:
+    st.session_state["summary_cache"] = {}
+
+
+@st.fragment
+def render_history(conversation: List[Dict[str, Any]]) -> None:
+    """Render past turns; widget interactions inside only rerun this fragment."""
+    assistant_counter = 0
+    for msg in conversation:
+        with st.chat_message(msg["role"]):
+            if msg["role"] == "assistant":
+                assistant_counter += 1
+                msg.setdefault("message_key", str(assistant_counter))
+                render_assistant_message(msg, key=msg["message_key"])
+            else:
+                st.markdown(msg.get("content", ""))
 
-assistant_counter = 0
-for msg in st.session_state["conversation"]:
-    with st.chat_message(msg["role"]):
-        if msg["role"] == "assistant":
-            assistant_counter += 1
-            msg.setdefault("message_key", str(assistant_counter))
-            render_assistant_message(msg, key=msg["message_key"])
-        else:
-            st.markdown(msg.get("content", ""))
+
+# Fragment reruns reuse these arguments. A snapshot keeps turns appended later in
+# this run, which are drawn outside the fragment, from being drawn again inside it.
+render_history(list(st.session_state["conversation"]))
 
 prompt = st.chat_input("Ask your data question…")
 
 if prompt:
+    # Accidental double submits reuse the previous answer instead of re-running it.
+    repeated_answer = None if force_refresh else find_repeated_answer(prompt, st.session_state["conversation"])
+
     with st.chat_message("user"):
         st.markdown(prompt)
-    st.session_state["conversation"].append({"role": "user", "content": prompt})
+    user_message = {"role": "user", "content": prompt}
+    index_table_references(st.session_state["table_refs"], user_message, len(st.session_state["conversation"]))
+    st.session_state["conversation"].append(user_message)
 
     with st.chat_message("assistant"):
         with st.spinner("Analyzing data with the MCP BigQuery agent…"):
-            try:
-                message = process_question(
-                    question=prompt,
-                    client=client,
-                    config=agent_config,
-                    metadata=metadata_payload,
-                    llm_client=llm_client,
-                    conversation_history=st.session_state["conversation"],
-                )
-            except RuntimeError as exc:
-                message = {"role": "assistant", "error": str(exc), "content": f"❌ {exc}"}
+            if repeated_answer is not None:
+                message = repeated_answer
+            else:
+                try:
+                    message = process_question(
+                        question=prompt,
+                        client=client,
+                        config=agent_config,
+                        metadata=metadata_payload,
+                        llm_client=llm_client,
+                        conversation_history=st.session_state["conversation"],
+                        history_summary=st.session_state["history_summary"],
+                        plan_cache=st.session_state["plan_cache"],
+                        summary_cache=st.session_state["summary_cache"],
+                        force_refresh=force_refresh,
+                        table_refs=st.session_state["table_refs"],
+                    )
+                except RuntimeError as exc:
+                    message = {"role": "assistant", "error": str(exc), "content": f"❌ {exc}"}
 
             assistant_runs = sum(1 for item in st.session_state["conversation"] if item["role"] == "assistant")
             message_key = str(assistant_runs + 1)
             message["message_key"] = message_key
             render_assistant_message(message, key=message_key)
+
+            # Collected after rendering so the summary stream is not held up by it.
+            if history_future := message.pop("history_future", None):
+                try:
+                    st.session_state["history_summary"] = history_future.result()
+                except Exception:  # pragma: no cover - keep the previous summary on failure
+                    pass
+            index_table_references(st.session_state["table_refs"], message, len(st.session_state["conversation"]))
             st.session_state["conversation"].append(message)
 
 st.sidebar.markdown("---")
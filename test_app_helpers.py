@@ -0,0 +1,196 @@
+"""
+Tests for the pure helper functions in the Streamlit app.
+
+Run with pytest (``pytest test_app_helpers.py``); the ``app_module`` fixture
+lives in ``conftest.py``.
+"""
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("SELECT * FROM `proj.sales.orders`", ["proj.sales.orders"]),
+        (
+            "select * from proj.sales.orders o join proj.sales.items i",
+            ["proj.sales.orders", "proj.sales.items"],
+        ),
+        ("Use `proj.sales.orders` again", ["proj.sales.orders"]),
+        ("SELECT t.address.city FROM t", []),
+        ("What changed in version 1.2.3?", []),
+        ("SELECT * FROM `1.2.3`", []),
+        ("SELECT * FROM proj.sales.orders.extra", []),
+        ("SELECT * FROM `proj.sales.INFORMATION_SCHEMA`", []),
+        (None, []),
+    ],
+)
+def test_find_table_references(app_module, text, expected):
+    """Only backticked or FROM/JOIN table references count; dotted paths do not."""
+    assert app_module.find_table_references(text) == expected
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("SELECT rate_limit FROM t", "SELECT rate_limit FROM t\nLIMIT 200;"),
+        ("SELECT * FROM t LIMIT 10", "SELECT * FROM t LIMIT 10"),
+        ("SELECT * FROM t\nlimit 10;", "SELECT * FROM t\nlimit 10;"),
+        (
+            "SELECT * FROM t WHERE note = 'limit 5'",
+            "SELECT * FROM t WHERE note = 'limit 5'\nLIMIT 200;",
+        ),
+        ("SELECT * FROM t -- limit 5", "SELECT * FROM t -- limit 5\nLIMIT 200;"),
+        (
+            "SELECT * FROM t /* limit 5\n */",
+            "SELECT * FROM t /* limit 5\n */\nLIMIT 200;",
+        ),
+        ("SELECT * FROM t LIMIT @row_limit", "SELECT * FROM t LIMIT @row_limit"),
+        ("SELECT * FROM t;", "SELECT * FROM t\nLIMIT 200;"),
+        ("SELECT * FROM t ;  \n", "SELECT * FROM t\nLIMIT 200;"),
+    ],
+)
+def test_ensure_limit_clause(app_module, sql, expected):
+    """A LIMIT is added unless the query already applies one outside quotes."""
+    assert app_module.ensure_limit_clause(sql, 200) == expected
+
+
+def test_ensure_limit_clause_disabled(app_module):
+    """A row limit of zero leaves the query untouched."""
+    assert app_module.ensure_limit_clause("SELECT * FROM t;", 0) == "SELECT * FROM t;"
+
+
+@pytest.mark.parametrize(
+    "raw_text",
+    [
+        '{"sql": "SELECT 1"}',
+        '```json\n{"sql": "SELECT 1"}\n```',
+        'Here is the plan:\n{"sql": "SELECT 1"}\nLet me know if it helps.',
+        'Replace {table} with yours: {"sql": "SELECT 1"} (see {docs}).',
+        'Values like {"a"} are invalid; the plan is {"sql": "SELECT 1"}',
+    ],
+)
+def test_parse_json_response_recovers(app_module, raw_text):
+    """The first JSON object is found even when prose around it contains braces."""
+    assert app_module.parse_json_response(raw_text) == {"sql": "SELECT 1"}
+
+
+@pytest.mark.parametrize(
+    "raw_text", ["", "   ", "No JSON here", "{not json}", "[1, 2]"]
+)
+def test_parse_json_response_rejects(app_module, raw_text):
+    """Text without a JSON object is an error."""
+    with pytest.raises(ValueError):
+        app_module.parse_json_response(raw_text)
+
+
+def test_parse_json_response_strict(app_module):
+    """Strict mode accepts plain JSON only and does not search prose."""
+    assert app_module.parse_json_response(' {"sql": "SELECT 1"} ', strict=True) == {
+        "sql": "SELECT 1"
+    }
+    with pytest.raises(ValueError, match="not valid JSON"):
+        app_module.parse_json_response('Plan: {"sql": "SELECT 1"}', strict=True)
+
+
+@pytest.mark.parametrize(
+    "partial_json, expected",
+    [
+        ('{"sql": "SELECT * FROM t', None),
+        ('{"sql": "SELECT * FROM t"', "SELECT * FROM t"),
+        ('{"sql": "SELECT * FROM t", "analysis_steps": [', "SELECT * FROM t"),
+        ('{"sql": "SELECT \\"a\\" FROM t', None),
+        ('{"sql": "SELECT \\"a\\" FROM t"}', 'SELECT "a" FROM t'),
+        ('{"sql": "SELECT \'x\\\\', None),
+        ('{"sql": null, "analysis_steps": []}', None),
+        ('{"analysis_steps": ["Read the table"]', None),
+        ("", None),
+    ],
+)
+def test_extract_streamed_sql(app_module, partial_json, expected):
+    """The SQL is only returned once its string value has closed."""
+    assert app_module.extract_streamed_sql(partial_json) == expected
+
+
+def test_compute_preview_stats(app_module):
+    """Numeric columns get stats; datetime and text columns are left out."""
+    rows = [
+        {"total": 3, "price": 1.5, "name": "a", "at": "2024-01-01T00:00:00Z"},
+        {"total": None, "price": 4.0, "name": "b", "at": "2024-01-02T00:00:00Z"},
+        {"total": 7, "price": None, "name": None, "at": None},
+        {"total": 1, "price": 2.5, "name": "d", "at": "2024-01-03T00:00:00Z"},
+    ]
+    column_types = {
+        "total": "INTEGER",
+        "price": "FLOAT",
+        "name": "STRING",
+        "at": "TIMESTAMP",
+    }
+    stats = app_module.compute_preview_stats(
+        app_module.rows_to_dataframe(rows, column_types)
+    )
+
+    assert stats == {
+        "total": {"count": 3, "null_pct": 25.0, "min": 1.0, "max": 7.0},
+        "price": {"count": 3, "null_pct": 25.0, "min": 1.5, "max": 4.0},
+    }
+
+
+def test_compute_preview_stats_all_null(app_module):
+    """An all-null numeric column has a count of zero and no min or max."""
+    rows = [{"total": None}, {"total": None}]
+    df = app_module.rows_to_dataframe(rows, {"total": "INTEGER"})
+    assert app_module.compute_preview_stats(df) == {
+        "total": {"count": 0, "null_pct": 100.0, "min": None, "max": None}
+    }
+
+
+def test_compute_preview_stats_no_numeric_columns(app_module):
+    """Results without numeric columns, or without rows, have no stats."""
+    df = app_module.rows_to_dataframe(
+        [{"at": "2024-01-01T00:00:00Z"}], {"at": "TIMESTAMP"}
+    )
+    assert app_module.compute_preview_stats(df) == {}
+    assert app_module.compute_preview_stats(app_module.rows_to_dataframe([])) == {}
+
+
+_ANSWER = {"role": "assistant", "content": "Two orders.", "message_key": "1"}
+
+
+@pytest.mark.parametrize(
+    "question, conversation, expected",
+    [
+        (
+            "How many orders?",
+            [{"role": "user", "content": "How many orders?"}, _ANSWER],
+            True,
+        ),
+        (
+            "  How many orders? ",
+            [{"role": "user", "content": "How many orders?"}, _ANSWER],
+            True,
+        ),
+        (
+            "How many items?",
+            [{"role": "user", "content": "How many orders?"}, _ANSWER],
+            False,
+        ),
+        (
+            "How many orders?",
+            [
+                {"role": "user", "content": "How many orders?"},
+                {"role": "assistant", "content": "❌ failed", "error": "failed"},
+            ],
+            False,
+        ),
+        ("How many orders?", [_ANSWER], False),
+        ("How many orders?", [], False),
+    ],
+)
+def test_find_repeated_answer(app_module, question, conversation, expected):
+    """Only a repeat of the last answered question reuses its answer."""
+    repeated = app_module.find_repeated_answer(question, conversation)
+    if expected:
+        assert repeated == {"role": "assistant", "content": "Two orders."}
+    else:
+        assert repeated is None
@@ -0,0 +1,360 @@
+"""
+Tests for the question pipeline in the Streamlit app.
+
+process_question and generate_sql_plan run end to end against the fake LLM and
+MCP clients from ``conftest.py``, so no API key or MCP server is needed.
+
+Run with pytest (``pytest test_app_pipeline.py``).
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+_QUESTION = "What are the order totals?"
+
+
+def _metadata():
+    return {
+        "available_datasets": ["sales"],
+        "selected_dataset": "sales",
+        "table_schemas": {},
+    }
+
+
+def test_empty_summary_stream_falls_back(app_module, sample_config, fake_llm, fake_mcp):
+    """A summary stream with no deltas keeps the basic summary and is not cached."""
+    llm_client = fake_llm(summary_chunks=())
+    client = fake_mcp()
+    summary_cache = OrderedDict()
+
+    message = app_module.process_question(
+        _QUESTION,
+        client,
+        sample_config,
+        _metadata(),
+        llm_client,
+        summary_cache=summary_cache,
+    )
+    fallback = message["content"]
+    assert fallback == app_module.basic_summary(_QUESTION, message["preview_rows"])
+
+    app_module.render_assistant_message(message)
+    assert message["content"] == fallback
+    assert not summary_cache
+
+    # The blank answer was not cached, so asking again goes back to the LLM.
+    message = app_module.process_question(
+        _QUESTION,
+        client,
+        sample_config,
+        _metadata(),
+        llm_client,
+        summary_cache=summary_cache,
+    )
+    assert list(message["content_stream"]) == []
+    assert len(llm_client.client.requests_for("summary")) == 2
+
+
+def test_streamed_summary_is_cached(app_module, sample_config, fake_llm, fake_mcp):
+    """A non-empty summary is cached and replayed for an identical question."""
+    llm_client = fake_llm(summary_chunks=("Two ", "orders."))
+    client = fake_mcp()
+    summary_cache = OrderedDict()
+
+    message = app_module.process_question(
+        _QUESTION,
+        client,
+        sample_config,
+        _metadata(),
+        llm_client,
+        summary_cache=summary_cache,
+    )
+    app_module.render_assistant_message(message)
+    assert message["content"] == "Two orders."
+
+    message = app_module.process_question(
+        _QUESTION,
+        client,
+        sample_config,
+        _metadata(),
+        llm_client,
+        summary_cache=summary_cache,
+    )
+    assert list(message["content_stream"]) == ["Two orders."]
+    assert len(llm_client.client.requests_for("summary")) == 1
+
+
+def test_schema_loading_is_cached(app_module, fake_mcp):
+    """Reruns with cached schemas make no requests; failed lookups are cached too."""
+    client = fake_mcp(schemas={"sales.orders": [{"name": "id", "type": "INTEGER"}]})
+    table_ids = ["orders", "missing", "orders"]
+
+    schemas, errors = app_module.load_table_schemas_parallel(client, "sales", table_ids)
+    assert list(schemas) == ["orders"]
+    assert list(errors) == ["missing"]
+    assert sorted(client.schema_requests) == [("sales", "missing"), ("sales", "orders")]
+
+    assert app_module.load_table_schemas_parallel(client, "sales", table_ids) == (
+        schemas,
+        errors,
+    )
+    assert len(client.schema_requests) == 2
+
+
+def test_stale_schemas_are_refetched(app_module, fake_mcp, monkeypatch):
+    """Entries older than their TTL are fetched again; failures expire sooner."""
+    client = fake_mcp(schemas={"sales.orders": [{"name": "id", "type": "INTEGER"}]})
+    app_module.load_table_schemas_parallel(client, "sales", ["orders", "missing"])
+
+    now = app_module.time.monotonic()
+    monkeypatch.setattr(
+        app_module.time,
+        "monotonic",
+        lambda: now + app_module.SCHEMA_ERROR_TTL_SECONDS + 1,
+    )
+    app_module.load_table_schemas_parallel(client, "sales", ["orders", "missing"])
+    assert client.schema_requests[2:] == [("sales", "missing")]
+
+
+def test_referenced_tables_are_prefetched(
+    app_module, sample_config, fake_llm, fake_mcp
+):
+    """Only tables in known datasets are fetched, keyed by their full reference."""
+    llm_client = fake_llm()
+    client = fake_mcp(
+        schemas={
+            "archive.orders": [{"name": "id", "type": "INTEGER"}],
+            "sales.customers": [{"name": "city", "type": "STRING"}],
+        }
+    )
+    metadata = {
+        "available_datasets": ["sales", "archive"],
+        "selected_dataset": "sales",
+        "table_schemas": {"orders": [{"name": "id", "type": "INTEGER"}]},
+    }
+    question = (
+        "Compare t.address.city for release 1.2.3 across `proj.sales.orders`, "
+        "`proj.archive.orders`, `proj.sales.customers`, `proj.sales.gone` "
+        "and `other.unknown.t`"
+    )
+
+    app_module.process_question(question, client, sample_config, metadata, llm_client)
+    assert sorted(client.schema_requests) == [
+        ("archive", "orders"),
+        ("sales", "customers"),
+        ("sales", "gone"),
+    ]
+    prompt = llm_client.client.requests_for("plan")[0]["messages"][-1]["content"]
+    assert '"proj.archive.orders"' in prompt
+    assert '"proj.sales.customers"' in prompt
+
+    # Misses are cached along with the schemas, so a rerun looks nothing up.
+    app_module.process_question(
+        question + "?", client, sample_config, metadata, llm_client
+    )
+    assert len(client.schema_requests) == 3
+
+
+def test_early_query_runs_on_its_own_thread(
+    app_module, sample_config, fake_llm, fake_mcp
+):
+    """The streamed SQL starts on a dedicated thread and its result is reused."""
+    client = fake_mcp()
+    message = app_module.process_question(
+        _QUESTION, client, sample_config, _metadata(), fake_llm()
+    )
+    assert client.queries == [message["sql"]]
+    assert client.query_threads[0].startswith("mcp-early-query")
+
+
+def test_unreadable_plan_reuses_early_query(
+    app_module, sample_config, fake_llm, fake_mcp
+):
+    """If the plan breaks after its SQL streamed, the started query is still used."""
+    truncated_plan = (
+        '{"sql": "SELECT name, total FROM `proj.sales.orders`", "analysis_steps": ['
+    )
+    client = fake_mcp()
+    plan_cache = OrderedDict()
+
+    message = app_module.process_question(
+        _QUESTION,
+        client,
+        sample_config,
+        _metadata(),
+        fake_llm(plan=truncated_plan),
+        plan_cache=plan_cache,
+    )
+    assert client.queries == [message["sql"]]
+    assert message["sql"].startswith("SELECT name, total FROM `proj.sales.orders`")
+    assert message["assumptions"]
+    assert message["preview_rows"] == client.rows
+    assert not plan_cache
+
+
+def test_plan_without_sql_still_fails(app_module, sample_config, fake_llm, fake_mcp):
+    """A plan that breaks before any SQL streamed is an error, and nothing runs."""
+    client = fake_mcp()
+    with pytest.raises(RuntimeError, match="Failed to generate SQL plan"):
+        app_module.process_question(
+            _QUESTION,
+            client,
+            sample_config,
+            _metadata(),
+            fake_llm(plan='{"analysis_steps": ['),
+        )
+    assert client.queries == []
+
+
+def test_failed_query_cancels_history_refresh(
+    app_module, sample_config, fake_llm, fake_mcp, monkeypatch
+):
+    """The running-summary refresh is cancelled when the query fails."""
+    pending = Future()
+    monkeypatch.setattr(
+        app_module,
+        "get_summary_executor",
+        lambda: SimpleNamespace(submit=lambda *args, **kwargs: pending),
+    )
+    client = fake_mcp(query_error="Syntax error")
+
+    with pytest.raises(RuntimeError, match="Syntax error"):
+        app_module.process_question(
+            _QUESTION, client, sample_config, _metadata(), fake_llm()
+        )
+    assert pending.cancelled()
+
+
+def test_preview_stats_cover_the_preview(app_module, sample_config, fake_llm, fake_mcp):
+    """Column statistics describe the displayed preview, not the download rows."""
+    rows = [
+        {"name": str(i), "total": i} for i in range(app_module.RESULT_PREVIEW_ROWS + 50)
+    ]
+    message = app_module.process_question(
+        _QUESTION, fake_mcp(rows=rows), sample_config, _metadata(), fake_llm()
+    )
+    assert len(message["download_rows"]) == len(rows)
+    assert message["preview_stats"]["total"]["count"] == app_module.RESULT_PREVIEW_ROWS
+    assert (
+        message["preview_stats"]["total"]["max"] == app_module.RESULT_PREVIEW_ROWS - 1
+    )
+
+
+@pytest.mark.parametrize("question", ["", "   ", "top 5"])
+def test_short_opening_question_is_rejected(
+    app_module, sample_config, fake_llm, fake_mcp, question
+):
+    """Opening questions shorter than MIN_QUESTION_LENGTH never reach the LLM."""
+    llm_client = fake_llm()
+    with pytest.raises(RuntimeError, match="more specific"):
+        app_module.process_question(
+            question, fake_mcp(), sample_config, _metadata(), llm_client
+        )
+    assert llm_client.client.requests == []
+
+
+def test_short_follow_up_is_answered(app_module, sample_config, fake_llm, fake_mcp):
+    """Once there is an answer to follow up on, short questions are allowed."""
+    conversation = [
+        {"role": "user", "content": _QUESTION},
+        {"role": "assistant", "content": "Two orders.", "sql": "SELECT 1"},
+    ]
+    message = app_module.process_question(
+        "top 5", fake_mcp(), sample_config, _metadata(), fake_llm(), conversation
+    )
+    assert message["sql"]
+
+    with pytest.raises(RuntimeError, match="more specific"):
+        app_module.process_question(
+            " ", fake_mcp(), sample_config, _metadata(), fake_llm(), conversation
+        )
+
+
+def test_failed_query_plan_is_not_cached(app_module, sample_config, fake_llm, fake_mcp):
+    """Retrying after a failed query asks the LLM for a new plan."""
+    llm_client = fake_llm()
+    client = fake_mcp(query_error="Syntax error")
+    plan_cache = OrderedDict()
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="Syntax error"):
+            app_module.process_question(
+                _QUESTION,
+                client,
+                sample_config,
+                _metadata(),
+                llm_client,
+                plan_cache=plan_cache,
+            )
+    assert not plan_cache
+    assert len(llm_client.client.requests_for("plan")) == 2
+
+
+def test_plan_without_sql_is_not_cached(app_module, sample_config, fake_llm, fake_mcp):
+    """Retrying after a plan without SQL asks the LLM for a new plan."""
+    llm_client = fake_llm(plan={"sql": None, "analysis_steps": ["No table matches"]})
+    plan_cache = OrderedDict()
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="could not generate a valid SQL"):
+            app_module.process_question(
+                _QUESTION,
+                fake_mcp(),
+                sample_config,
+                _metadata(),
+                llm_client,
+                plan_cache=plan_cache,
+            )
+    assert not plan_cache
+    assert len(llm_client.client.requests_for("plan")) == 2
+
+
+def test_successful_plan_is_cached(app_module, sample_config, fake_llm, fake_mcp):
+    """A plan whose query succeeded is reused for the same question."""
+    llm_client = fake_llm()
+    plan_cache = OrderedDict()
+
+    for _ in range(2):
+        app_module.process_question(
+            _QUESTION,
+            fake_mcp(),
+            sample_config,
+            _metadata(),
+            llm_client,
+            plan_cache=plan_cache,
+        )
+    assert len(plan_cache) == 1
+    assert len(llm_client.client.requests_for("plan")) == 1
+
+
+def test_schema_store_is_capped(app_module, fake_mcp, monkeypatch):
+    """The schema store evicts least recently used entries beyond its cap."""
+    monkeypatch.setattr(app_module, "SCHEMA_CACHE_MAX_ENTRIES", 2)
+    store = app_module.get_schema_store()
+    client = fake_mcp()
+
+    for table_id in ["a", "b", "c"]:
+        app_module.load_table_schemas_parallel(client, "sales", [table_id])
+    assert len(store.entries) == 2
+    assert (client.base_url, "sales", "a") not in store.entries
+
+
+def test_expired_schema_entries_are_dropped(app_module, fake_mcp, monkeypatch):
+    """A lookup that finds an expired entry removes it from the store."""
+    store = app_module.get_schema_store()
+    client = fake_mcp()
+    key = (client.base_url, "sales", "missing")
+    app_module.load_table_schemas_parallel(client, "sales", ["missing"])
+    assert key in store.entries
+
+    now = app_module.time.monotonic()
+    monkeypatch.setattr(
+        app_module.time,
+        "monotonic",
+        lambda: now + app_module.SCHEMA_ERROR_TTL_SECONDS + 1,
+    )
+    assert store.get(key) is None
+    assert key not in store.entries
@@ -9,8 +9,15 @@ The fix ensures the LLM has access to conversation history to understand which t
 the user is referring to in follow-up questions.
 """
 
+import re
 from typing import Any, Dict, List
 
+# BigQuery table references like project.dataset.table, optionally wrapped in backticks
+_TABLE_PATTERN = re.compile(r'`?([a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+)`?')
+
+_BAR = "=" * 80
+_DASH = "-" * 80
+
 # Simulated conversation history after first question
 conversation_after_first_question: List[Dict[str, Any]] = [
     {
@@ -45,51 +52,47 @@ def extract_table_reference_from_history(
         if msg.get("role") == "assistant":
             sql = msg.get("sql", "")
             # Look for BigQuery table patterns like project.dataset.table
-            import re
-            pattern = r'`?([a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+)`?'
-            matches = re.findall(pattern, sql)
+            matches = _TABLE_PATTERN.findall(sql)
             if matches:
                 return matches[0]
         elif msg.get("role") == "user":
             content = msg.get("content", "")
             # Look for table references in user messages
-            import re
-            pattern = r'([a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+)'
-            matches = re.findall(pattern, content)
+            matches = _TABLE_PATTERN.findall(content)
             if matches:
                 return matches[0]
     return ""
 
 
 if __name__ == "__main__":
-    print("=" * 80)
+    print(_BAR)
     print("DEMONSTRATION: Conversation Context Preservation")
-    print("=" * 80)
+    print(_BAR)
     print()
 
     print("SCENARIO:")
-    print("-" * 80)
+    print(_DASH)
     print("1. User asks: 'what is the schema of the table ando-big-query.AndoSalesDataPrep.BoltOrderSales'")
     print("2. Assistant responds with schema information")
     print("3. User asks follow-up: 'can you show me sample data from the table for yesterday?'")
     print()
 
     print("THE PROBLEM (BEFORE FIX):")
-    print("-" * 80)
+    print(_DASH)
     print("• The LLM had NO access to conversation history")
     print("• When user says 'the table', the LLM doesn't know which table")
     print("• Result: Error - 'No dataset or table name was provided'")
     print()
 
     print("THE SOLUTION (AFTER FIX):")
-    print("-" * 80)
+    print(_DASH)
     print("• Conversation history is now passed to generate_sql_plan()")
     print("• LLM can see previous questions and SQL queries")
     print("• LLM extracts table reference from context")
     print()
 
     print("DEMONSTRATION:")
-    print("-" * 80)
+    print(_DASH)
     print("Conversation history contains:")
     print()
     for i, msg in enumerate(conversation_after_first_question, 1):
@@ -117,6 +120,6 @@ if __name__ == "__main__":
     print(f"   LIMIT 200")
     print()
 
-    print("=" * 80)
+    print(_BAR)
     print("SUCCESS: Follow-up questions now work with conversation context!")
-    print("=" * 80)
+    print(_BAR)
@@ -1,76 +1,162 @@
 #!/usr/bin/env python3
 """Integration test to verify Streamlit app works with MCP server."""
 import sys
+import ast
+import functools
+import io
+import os
+import importlib
+import importlib.metadata
+import importlib.util
 import inspect
+import re
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Dict, List
 
-sys.path.insert(0, 'src')
-sys.path.insert(0, 'ai_agent')
+# Only extend sys.path when the packages are not already importable (e.g. after
+# `pip install -e .`); absolute paths keep imports working if the cwd changes.
+REPO_ROOT = Path(__file__).resolve().parent
+if importlib.util.find_spec("mcp_bigquery") is None:
+    sys.path.insert(0, str(REPO_ROOT / "src"))
+if importlib.util.find_spec("ai_agent") is None:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from script_output import ThreadLocalStdout
+
+_BAR = "=" * 70
+_DASH = "-" * 70
+
 
 def print_header(text: str):
     """Print a formatted header."""
-    print("\n" + "=" * 70)
-    print(f" {text}")
-    print("=" * 70)
+    print(f"\n{_BAR}\n {text}\n{_BAR}")
+
+
+def write_section(lines: List[str]):
+    """Write a block of lines with a single stdout write."""
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+@functools.lru_cache(maxsize=None)
+def _source(func) -> str:
+    """Return (and remember) the source of a function."""
+    return inspect.getsource(func)
+
+
+_ROUTE_METHODS = {"get", "post", "put", "patch", "delete"}
+
+
+@functools.lru_cache(maxsize=None)
+def _declared_routes(func) -> frozenset:
+    """Return the (METHOD, path) pairs declared by @router.<method>("...") decorators in func."""
+    tree = ast.parse(textwrap.dedent(_source(func)))
+    routes = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            if (
+                isinstance(decorator, ast.Call)
+                and isinstance(decorator.func, ast.Attribute)
+                and decorator.func.attr in _ROUTE_METHODS
+                and decorator.args
+                and isinstance(decorator.args[0], ast.Constant)
+                and isinstance(decorator.args[0].value, str)
+            ):
+                routes.add((decorator.func.attr.upper(), decorator.args[0].value))
+    return frozenset(routes)
+
+
+APP_PATH = REPO_ROOT / 'streamlit_app' / 'app.py'
+
+
+@functools.lru_cache(maxsize=1)
+def _read_source(path: str, mtime_ns: int, size: int) -> str:
+    """Read a file; the mtime/size arguments only key the cache so edits are picked up."""
+    # One read of the whole file and a single decode, rather than incremental text I/O.
+    return Path(path).read_bytes().decode('utf-8')
+
+
+def _app_source() -> str:
+    """Return the Streamlit app source, re-reading it only when the file changes."""
+    stat = APP_PATH.stat()
+    return _read_source(str(APP_PATH), stat.st_mtime_ns, stat.st_size)
 
 
 def test_imports():
     """Test that all required modules can be imported."""
     print_header("Testing Module Imports")
 
-    results = []
+    def run_checks():
+        """Yield one (status, message) pair per check so the caller can stop early."""
+        # Test MCP server components
+        try:
+            from mcp_bigquery.config.settings import ServerConfig
+            yield ("✓", "MCP ServerConfig")
+        except Exception as e:
+            yield ("✗", f"MCP ServerConfig: {e}")
 
-    # Test MCP server components
-    try:
-        from mcp_bigquery.config.settings import ServerConfig
-        results.append(("✓", "MCP ServerConfig"))
-    except Exception as e:
-        results.append(("✗", f"MCP ServerConfig: {e}"))
+        try:
+            from mcp_bigquery.api.fastapi_app import create_fastapi_app
+            yield ("✓", "FastAPI app creator")
+        except Exception as e:
+            yield ("✗", f"FastAPI app creator: {e}")
 
-    try:
-        from mcp_bigquery.api.fastapi_app import create_fastapi_app
-        results.append(("✓", "FastAPI app creator"))
-    except Exception as e:
-        results.append(("✗", f"FastAPI app creator: {e}"))
+        try:
+            from mcp_bigquery.routes.tools import create_tools_router
+            yield ("✓", "Tools router")
+        except Exception as e:
+            yield ("✗", f"Tools router: {e}")
 
-    try:
-        from mcp_bigquery.routes.tools import create_tools_router
-        results.append(("✓", "Tools router"))
-    except Exception as e:
-        results.append(("✗", f"Tools router: {e}"))
+        # Test Streamlit app components
+        try:
+            from ai_agent.tool_interface.mcp_tools import MCPTools
+            yield ("✓", "MCPTools client")
+        except Exception as e:
+            yield ("✗", f"MCPTools client: {e}")
 
-    # Test Streamlit app components
-    try:
-        from ai_agent.tool_interface.mcp_tools import MCPTools
-        results.append(("✓", "MCPTools client"))
-    except Exception as e:
-        results.append(("✗", f"MCPTools client: {e}"))
+        # Presence checks only: importing streamlit/openai here would pull in pandas and
+        # the rest of their dependency trees just to confirm they are installed.
+        if importlib.util.find_spec("streamlit") is not None:
+            yield ("✓", f"Streamlit (v{importlib.metadata.version('streamlit')})")
+        else:
+            yield ("✗", "Streamlit: not installed")
 
-    try:
-        import streamlit
-        results.append(("✓", f"Streamlit (v{streamlit.__version__})"))
-    except Exception as e:
-        results.append(("✗", f"Streamlit: {e}"))
+        if importlib.util.find_spec("openai") is not None:
+            yield ("✓", "OpenAI client")
+        else:
+            yield ("✗", "OpenAI client: not installed")
 
-    try:
-        from openai import OpenAI
-        results.append(("✓", "OpenAI client"))
-    except Exception as e:
-        results.append(("✗", f"OpenAI client: {e}"))
+    # MCP_FAIL_FAST=1 stops at the first failed import instead of attempting the rest.
+    fail_fast = os.getenv("MCP_FAIL_FAST") == "1"
+    results = []
+    for result in run_checks():
+        results.append(result)
+        if fail_fast and result[0] == "✗":
+            break
 
     for status, msg in results:
         print(f"{status} {msg}")
 
-    return all(r[0] == "✓" for r in results)
+    return "✗" not in (status for status, _ in results)
 
 
 def test_endpoint_compatibility():
     """Test that MCPTools methods match FastAPI routes."""
     print_header("Testing Endpoint Compatibility")
 
-    from ai_agent.tool_interface.mcp_tools import MCPTools
-
-    client = MCPTools(base_url="http://localhost:8005")
+    # The tests run concurrently, so test_imports may be importing this module
+    # right now. import_module waits for that import to finish (sys.modules can
+    # hold the half-initialised module) and is free once it has.
+    try:
+        module = importlib.import_module("ai_agent.tool_interface.mcp_tools")
+    except ImportError as e:
+        # test_imports reports (and fails on) the missing client already.
+        print(f"\n- Skipped: MCPTools client is not importable ({e})")
+        return True
+    MCPTools = module.MCPTools
 
     # Define expected endpoint mappings
     endpoint_mappings = {
@@ -87,10 +173,12 @@ def test_endpoint_compatibility():
     }
 
     print("\nMCPTools Method → Expected Endpoint Mapping:")
-    print("-" * 70)
+    print(_DASH)
 
+    # The methods live on the class; no need to build a client (and its session).
+    present = set(dir(MCPTools))
     for method_name, expected_endpoint in endpoint_mappings.items():
-        if hasattr(client, method_name):
+        if method_name in present:
             print(f"✓ {method_name:30s} → {expected_endpoint}")
         else:
             print(f"✗ {method_name:30s} → MISSING")
@@ -106,25 +194,22 @@ def test_route_definitions():
     from mcp_bigquery.routes.resources import create_resources_router
 
     # We can't create actual routers without BigQuery client,
-    # but we can inspect the source code
-    import inspect
-
-    tools_source = inspect.getsource(create_tools_router)
-    resources_source = inspect.getsource(create_resources_router)
+    # but we can parse their source and read the route decorators
+    declared_routes = _declared_routes(create_tools_router) | _declared_routes(create_resources_router)
 
     required_routes = {
-        "POST /tools/execute_bigquery_sql": "@router.post(\"/execute_bigquery_sql\")",
-        "POST /tools/get_tables": "@router.post(\"/get_tables\")",
-        "POST /tools/get_table_schema": "@router.post(\"/get_table_schema\")",
-        "GET /resources/list": "@router.get(\"/list\")",
+        "POST /tools/execute_bigquery_sql": ("POST", "/execute_bigquery_sql"),
+        "POST /tools/get_tables": ("POST", "/get_tables"),
+        "POST /tools/get_table_schema": ("POST", "/get_table_schema"),
+        "GET /resources/list": ("GET", "/list"),
     }
 
     print("\nRequired Routes:")
-    print("-" * 70)
+    print(_DASH)
 
     results = []
-    for route_name, route_decorator in required_routes.items():
-        if route_decorator in tools_source or route_decorator in resources_source:
+    for route_name, route in required_routes.items():
+        if route in declared_routes:
             print(f"✓ {route_name}")
             results.append(True)
         else:
@@ -138,8 +223,7 @@ def test_streamlit_app_structure():
     """Test that Streamlit app has proper structure."""
     print_header("Testing Streamlit App Structure")
 
-    with open('streamlit_app/app.py', 'r',encoding='utf-8') as f:
-        app_content = f.read()
+    app_content = _app_source()
 
     required_components = {
         "MCPTools import": "from ai_agent.tool_interface.mcp_tools import MCPTools",
@@ -153,11 +237,16 @@ def test_streamlit_app_structure():
     }
 
     print("\nStreamlit App Components:")
-    print("-" * 70)
+    print(_DASH)
+
+    # One pass over the source for all patterns; the lookahead also reports
+    # matches that overlap another pattern's match.
+    alternation = "|".join(map(re.escape, required_components.values()))
+    found = {match.group(1) for match in re.finditer(f"(?=({alternation}))", app_content)}
 
     results = []
     for component_name, search_string in required_components.items():
-        if search_string in app_content:
+        if search_string in found:
             print(f"✓ {component_name}")
             results.append(True)
         else:
@@ -173,20 +262,21 @@ def test_configuration():
 
     from mcp_bigquery.config.settings import ServerConfig
 
-    print("\nRequired Environment Variables:")
-    print("-" * 70)
-    print("• PROJECT_ID (required)")
-    print("• LOCATION (optional, default: US)")
-    print("• KEY_FILE (optional, uses default credentials if not set)")
-    print("• SUPABASE_URL (optional, for enhanced features)")
-    print("• SUPABASE_KEY (optional, for enhanced features)")
-
-    print("\nStreamlit App Environment Variables:")
-    print("-" * 70)
-    print("• OPENAI_API_KEY (required for Streamlit app)")
-    print("• MCP_BIGQUERY_BASE_URL (optional, default: http://localhost:8005)")
-    print("• MCP_SESSION_ID (optional)")
-    print("• MCP_USER_ID (optional)")
+    write_section([
+        "\nRequired Environment Variables:",
+        _DASH,
+        "• PROJECT_ID (required)",
+        "• LOCATION (optional, default: US)",
+        "• KEY_FILE (optional, uses default credentials if not set)",
+        "• SUPABASE_URL (optional, for enhanced features)",
+        "• SUPABASE_KEY (optional, for enhanced features)",
+        "\nStreamlit App Environment Variables:",
+        _DASH,
+        "• OPENAI_API_KEY (required for Streamlit app)",
+        "• MCP_BIGQUERY_BASE_URL (optional, default: http://localhost:8005)",
+        "• MCP_SESSION_ID (optional)",
+        "• MCP_USER_ID (optional)",
+    ])
 
     return True
 
@@ -196,33 +286,37 @@ def generate_report(all_tests_passed: bool):
     print_header("Integration Test Report")
 
     if all_tests_passed:
-        print("\n✓ ALL TESTS PASSED")
-        print("\nThe Streamlit app is properly integrated with the MCP server!")
-        print("\nNext Steps:")
-        print("1. Set up your .env file with required credentials:")
-        print("   - PROJECT_ID (BigQuery project)")
-        print("   - OPENAI_API_KEY (for Streamlit app)")
-        print("   - Optionally: SUPABASE_URL and SUPABASE_KEY")
-        print("\n2. Start the MCP server:")
-        print("   mcp-bigquery --transport http --host 0.0.0.0 --port 8005")
-        print("\n3. Run the Streamlit app:")
-        print("   streamlit run streamlit_app/app.py")
+        lines = [
+            "\n✓ ALL TESTS PASSED",
+            "\nThe Streamlit app is properly integrated with the MCP server!",
+            "\nNext Steps:",
+            "1. Set up your .env file with required credentials:",
+            "   - PROJECT_ID (BigQuery project)",
+            "   - OPENAI_API_KEY (for Streamlit app)",
+            "   - Optionally: SUPABASE_URL and SUPABASE_KEY",
+            "\n2. Start the MCP server:",
+            "   mcp-bigquery --transport http --host 0.0.0.0 --port 8005",
+            "\n3. Run the Streamlit app:",
+            "   streamlit run streamlit_app/app.py",
+        ]
     else:
-        print("\n✗ SOME TESTS FAILED")
-        print("\nPlease review the failed tests above and fix any issues.")
+        lines = [
+            "\n✗ SOME TESTS FAILED",
+            "\nPlease review the failed tests above and fix any issues.",
+        ]
 
-    print("\nIntegration Fixes Applied:")
-    print("-" * 70)
-    print("✓ Added POST /tools/get_tables endpoint")
-    print("✓ Added POST /tools/get_table_schema endpoint")
-    print("  These routes now match the MCPTools client expectations")
+    write_section(lines + [
+        "\nIntegration Fixes Applied:",
+        _DASH,
+        "✓ Added POST /tools/get_tables endpoint",
+        "✓ Added POST /tools/get_table_schema endpoint",
+        "  These routes now match the MCPTools client expectations",
+    ])
 
 
 def main():
     """Run all integration tests."""
-    print("\n" + "=" * 70)
-    print(" MCP BigQuery Server + Streamlit App Integration Test")
-    print("=" * 70)
+    print_header("MCP BigQuery Server + Streamlit App Integration Test")
 
     tests = [
         ("Module Imports", test_imports),
@@ -232,14 +326,36 @@ def main():
         ("Configuration", test_configuration),
     ]
 
-    results = []
-    for test_name, test_func in tests:
+    original_stdout = sys.stdout
+    stdout = ThreadLocalStdout(original_stdout)
+
+    def run_test(test_name, test_func):
+        # Each test prints into its own buffer so the output can be replayed in order.
+        buffer = io.StringIO()
+        stdout.capture(buffer)
         try:
             result = test_func()
-            results.append(result)
         except Exception as e:
             print(f"\n✗ Test '{test_name}' failed with error: {e}")
-            results.append(False)
+            result = False
+        finally:
+            stdout.release()
+        return result, buffer.getvalue()
+
+    # The tests share no state and are bound by imports and file reads, so run
+    # them concurrently and print their output in submission order.
+    sys.stdout = stdout
+    try:
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            futures = [executor.submit(run_test, name, func) for name, func in tests]
+            outcomes = [future.result() for future in futures]
+    finally:
+        sys.stdout = original_stdout
+
+    results = []
+    for result, output in outcomes:
+        sys.stdout.write(output)
+        results.append(result)
 
     all_passed = all(results)
     generate_report(all_passed)
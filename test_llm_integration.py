@@ -11,46 +11,124 @@ IMPORTANT: This script requires valid API keys set as environment variables:
 - OPENAI_API_KEY
 - ANTHROPIC_API_KEY
 - GEMINI_API_KEY
+
+Run it directly (python test_llm_integration.py) or with pytest
+(pytest test_llm_integration.py); providers without a key are skipped.
 """
+import asyncio
+import importlib.util
+import io
 import json
 import os
 import sys
 from pathlib import Path
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, NamedTuple, Optional
 
-# Add repo root to path
+# Add repo root to path unless streamlit_app is already importable
 REPO_ROOT = Path(__file__).resolve().parent
-if str(REPO_ROOT) not in sys.path:
+if importlib.util.find_spec("streamlit_app") is None:
     sys.path.append(str(REPO_ROOT))
 
-from streamlit_app.app import (
-    LLMProvider,
-    LLMClientWrapper,
-    initialise_llm_client,
-    invoke_llm,
-    parse_json_response,
-    PROVIDER_MODEL_DEFAULTS,
-)
+from script_output import ThreadLocalStdout
+
+# streamlit_app.app pulls in Streamlit, pandas and the provider SDKs, so it is
+# only imported once there is at least one API key to test with.
+if TYPE_CHECKING:
+    from streamlit_app.app import LLMClientWrapper, LLMProvider
+
+# Environment variable holding the API key for each provider, keyed by LLMProvider value.
+API_KEY_ENV_VARS = {
+    "OpenAI": "OPENAI_API_KEY",
+    "Anthropic": "ANTHROPIC_API_KEY",
+    "Gemini": "GEMINI_API_KEY",
+}
+
+
+# Status label for whether a provider's API key is set.
+API_KEY_STATUS = {True: "✅ Found", False: "❌ Missing"}
+
+# Summary label for a test result: True ran and passed, False ran and failed, None was skipped.
+TEST_STATUS = {True: "✅ PASS", False: "❌ FAIL", None: "⚠️  SKIP"}
+
+# Provider calls run concurrently; cap how many are in flight in case a provider rate-limits.
+MAX_CONCURRENT_CALLS = 3
+
+
+def _print_traceback():
+    """Print the active exception's traceback to stdout, so it is captured with the test output.
+
+    Imports used only on error paths are kept inside them: traceback pulls in
+    linecache and tokenize, which a passing run never needs.
+    """
+    import traceback
+
+    traceback.print_exc(file=sys.stdout)
+
+
+class ProviderRun(NamedTuple):
+    """Everything a provider test needs, resolved once before the tests start."""
+
+    provider: "LLMProvider"
+    name: str
+    model: str
+    api_key: str
+
+
+def _run_captured(stdout: ThreadLocalStdout, test_func, run: ProviderRun):
+    """Run one provider test, returning its result and everything it printed."""
+    buffer = io.StringIO()
+    stdout.capture(buffer)
+    try:
+        return test_func(run.provider, run.api_key, run.model), buffer.getvalue()
+    finally:
+        stdout.release()
+
+
+async def _run_provider_tests(stdout: ThreadLocalStdout, tests):
+    """Run (test_func, ProviderRun) pairs concurrently; the SDK calls block, so use threads."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+
+    async def run(test_func, provider_run):
+        async with semaphore:
+            return await asyncio.to_thread(_run_captured, stdout, test_func, provider_run)
 
+    return await asyncio.gather(*(run(test_func, provider_run) for test_func, provider_run in tests))
 
-def test_simple_json_question(provider: LLMProvider, api_key: str) -> bool:
+
+def check_simple_json_question(
+    provider: "LLMProvider",
+    api_key: str,
+    model: Optional[str] = None,
+    llm_client: Optional["LLMClientWrapper"] = None,
+) -> bool:
     """Test a simple question that should return JSON with SQL."""
+    from streamlit_app.app import (
+        PROVIDER_MODEL_DEFAULTS,
+        initialise_llm_client,
+        invoke_llm,
+        parse_json_response,
+    )
+
+    name = provider.value
+    model = model or PROVIDER_MODEL_DEFAULTS[provider]
+
     print(f"\n{'='*70}")
-    print(f"Testing {provider.value} with simple SQL generation")
+    print(f"Testing {name} with simple SQL generation")
     print('='*70)
 
     if not api_key:
-        print(f"⚠️  No API key found for {provider.value}, skipping...")
+        print(f"⚠️  No API key found for {name}, skipping...")
         return None
 
     try:
-        # Initialize client
-        llm_client = initialise_llm_client(provider, api_key)
+        # Initialize client unless a shared one was passed in
+        if llm_client is None:
+            llm_client = initialise_llm_client(provider, api_key)
         if not llm_client:
-            print(f"❌ Failed to initialize {provider.value} client")
+            print(f"❌ Failed to initialize {name} client")
             return False
 
-        print(f"✅ {provider.value} client initialized")
+        print(f"✅ {name} client initialized")
 
         # Create a simple test question
         test_messages = [
@@ -73,17 +151,17 @@ def test_simple_json_question(provider: LLMProvider, api_key: str) -> bool:
             },
         ]
 
-        print(f"📤 Sending request to {provider.value}...")
+        print(f"📤 Sending request to {name}...")
 
         # Invoke LLM
         response_text = invoke_llm(
             llm_client=llm_client,
-            model=PROVIDER_MODEL_DEFAULTS[provider],
+            model=model,
             messages=test_messages,
             temperature=0.1,
         )
 
-        print(f"📥 Raw response from {provider.value}:")
+        print(f"📥 Raw response from {name}:")
         print(f"   {response_text[:200]}...")
 
         # Try to parse JSON
@@ -97,7 +175,7 @@ def test_simple_json_question(provider: LLMProvider, api_key: str) -> bool:
                 print(f"✅ SQL field found: {sql[:100] if sql else 'NULL'}...")
 
                 if sql:
-                    print(f"✅ {provider.value} successfully generated SQL")
+                    print(f"✅ {name} successfully generated SQL")
                     return True
                 else:
                     print(f"❌ SQL field is null or empty")
@@ -114,27 +192,43 @@ def test_simple_json_question(provider: LLMProvider, api_key: str) -> bool:
             return False
 
     except Exception as e:
-        print(f"❌ {provider.value} test failed: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"❌ {name} test failed: {e}")
+        _print_traceback()
         return False
 
 
-def test_schema_question(provider: LLMProvider, api_key: str) -> bool:
+def check_schema_question(
+    provider: "LLMProvider",
+    api_key: str,
+    model: Optional[str] = None,
+    llm_client: Optional["LLMClientWrapper"] = None,
+) -> bool:
     """Test the actual failing question: 'Show me the schema of...'"""
+    from streamlit_app.app import (
+        PROVIDER_MODEL_DEFAULTS,
+        SYSTEM_MESSAGE,
+        initialise_llm_client,
+        invoke_llm,
+        parse_json_response,
+    )
+
+    name = provider.value
+    model = model or PROVIDER_MODEL_DEFAULTS[provider]
+
     print(f"\n{'='*70}")
-    print(f"Testing {provider.value} with schema question (reproducing error)")
+    print(f"Testing {name} with schema question (reproducing error)")
     print('='*70)
 
     if not api_key:
-        print(f"⚠️  No API key found for {provider.value}, skipping...")
+        print(f"⚠️  No API key found for {name}, skipping...")
         return None
 
     try:
-        # Initialize client
-        llm_client = initialise_llm_client(provider, api_key)
+        # Initialize client unless a shared one was passed in
+        if llm_client is None:
+            llm_client = initialise_llm_client(provider, api_key)
         if not llm_client:
-            print(f"❌ Failed to initialize {provider.value} client")
+            print(f"❌ Failed to initialize {name} client")
             return False
 
         # Simulate the exact prompt from generate_sql_plan
@@ -161,8 +255,6 @@ def test_schema_question(provider: LLMProvider, api_key: str) -> bool:
             },
         }
 
-        from streamlit_app.app import SYSTEM_MESSAGE
-
         test_messages = [
             {
                 "role": "system",
@@ -180,21 +272,22 @@ def test_schema_question(provider: LLMProvider, api_key: str) -> bool:
             },
             {
                 "role": "user",
-                "content": json.dumps(prompt_payload, indent=2),
+                # Compact separators: whitespace only costs tokens and encoding time.
+                "content": json.dumps(prompt_payload, separators=(",", ":")),
             },
         ]
 
-        print(f"📤 Sending schema question to {provider.value}...")
+        print(f"📤 Sending schema question to {name}...")
 
         # Invoke LLM
         response_text = invoke_llm(
             llm_client=llm_client,
-            model=PROVIDER_MODEL_DEFAULTS[provider],
+            model=model,
             messages=test_messages,
             temperature=0.1,
         )
 
-        print(f"📥 Raw response from {provider.value}:")
+        print(f"📥 Raw response from {name}:")
         print(f"   {response_text[:300]}...")
 
         # Try to parse JSON
@@ -202,21 +295,23 @@ def test_schema_question(provider: LLMProvider, api_key: str) -> bool:
             response_json = parse_json_response(response_text)
             print(f"✅ JSON parsed successfully")
             print(f"   Keys: {list(response_json.keys())}")
-            print(f"\n📋 Full response:")
-            print(json.dumps(response_json, indent=2))
 
             if "sql" in response_json:
                 sql = response_json["sql"]
                 if sql:
-                    print(f"\n✅ {provider.value} generated SQL for schema question")
+                    print(f"\n✅ {name} generated SQL for schema question")
                     print(f"   SQL: {sql}")
                     return True
                 else:
                     print(f"\n❌ SQL field is null - this is the reported error!")
                     print(f"   Analysis steps: {response_json.get('analysis_steps')}")
+                    print(f"\n📋 Full response:")
+                    print(json.dumps(response_json, indent=2))
                     return False
             else:
                 print(f"❌ No 'sql' field in response")
+                print(f"\n📋 Full response:")
+                print(json.dumps(response_json, indent=2))
                 return False
 
         except Exception as e:
@@ -225,12 +320,24 @@ def test_schema_question(provider: LLMProvider, api_key: str) -> bool:
             return False
 
     except Exception as e:
-        print(f"❌ {provider.value} test failed: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"❌ {name} test failed: {e}")
+        _print_traceback()
         return False
 
 
+# --- pytest entry points -----------------------------------------------------
+# The llm_* fixtures live in conftest.py; they build each provider's SDK client
+# once per session and skip providers without an API key.
+
+
+def test_simple_json_question(llm_provider, llm_api_key, llm_model, llm_client):
+    assert check_simple_json_question(llm_provider, llm_api_key, llm_model, llm_client) is True
+
+
+def test_schema_question(llm_provider, llm_api_key, llm_model, llm_client):
+    assert check_schema_question(llm_provider, llm_api_key, llm_model, llm_client) is True
+
+
 def main():
     """Run integration tests for all providers."""
     print("="*70)
@@ -239,28 +346,44 @@ def main():
     print("="*70)
 
     # Get API keys from environment
-    api_keys = {
-        LLMProvider.OPENAI: os.getenv("OPENAI_API_KEY"),
-        LLMProvider.ANTHROPIC: os.getenv("ANTHROPIC_API_KEY"),
-        LLMProvider.GEMINI: os.getenv("GEMINI_API_KEY"),
-    }
+    env_keys = {name: os.getenv(env_var) for name, env_var in API_KEY_ENV_VARS.items()}
 
     # Check which providers have keys
     print("\n🔑 API Key Status:")
-    for provider, key in api_keys.items():
-        status = "✅ Found" if key else "❌ Missing"
-        print(f"   {provider.value}: {status}")
+    for name, key in env_keys.items():
+        print(f"   {name}: {API_KEY_STATUS[bool(key)]}")
 
-    available_providers = [p for p, k in api_keys.items() if k]
-
-    if not available_providers:
+    if not any(env_keys.values()):
         print("\n❌ No API keys found! Set environment variables:")
-        print("   - OPENAI_API_KEY")
-        print("   - ANTHROPIC_API_KEY")
-        print("   - GEMINI_API_KEY")
+        for env_var in API_KEY_ENV_VARS.values():
+            print(f"   - {env_var}")
         return False
 
-    print(f"\n📊 Testing {len(available_providers)} provider(s)")
+    from streamlit_app.app import PROVIDER_MODEL_DEFAULTS, LLMProvider
+
+    # Resolve provider, display name, model and key once; the concurrent tests
+    # below all see the same bindings.
+    provider_runs = [
+        ProviderRun(provider, provider.value, PROVIDER_MODEL_DEFAULTS[provider], key)
+        for provider, key in ((LLMProvider(name), key) for name, key in env_keys.items())
+        if key
+    ]
+
+    print(f"\n📊 Testing {len(provider_runs)} provider(s)")
+
+    # Both tests for every provider are network-bound and independent, so issue
+    # them all at once; output is buffered per test and printed in order below.
+    tests = [(check_simple_json_question, run) for run in provider_runs]
+    tests += [(check_schema_question, run) for run in provider_runs]
+    original_stdout = sys.stdout
+    stdout = ThreadLocalStdout(original_stdout)
+    sys.stdout = stdout
+    try:
+        outcomes = asyncio.run(_run_provider_tests(stdout, tests))
+    finally:
+        sys.stdout = original_stdout
+    simple_outcomes = outcomes[: len(provider_runs)]
+    schema_outcomes = outcomes[len(provider_runs) :]
 
     # Test 1: Simple SQL generation
     print("\n" + "="*70)
@@ -268,9 +391,9 @@ def main():
     print("="*70)
 
     simple_results = {}
-    for provider in available_providers:
-        result = test_simple_json_question(provider, api_keys[provider])
-        simple_results[provider] = result
+    for run, (result, output) in zip(provider_runs, simple_outcomes):
+        sys.stdout.write(output)
+        simple_results[run.provider] = result
 
     # Test 2: Schema question (reproducing the error)
     print("\n" + "="*70)
@@ -278,26 +401,20 @@ def main():
     print("="*70)
 
     schema_results = {}
-    for provider in available_providers:
-        result = test_schema_question(provider, api_keys[provider])
-        schema_results[provider] = result
+    for run, (result, output) in zip(provider_runs, schema_outcomes):
+        sys.stdout.write(output)
+        schema_results[run.provider] = result
 
     # Print summary
     print("\n" + "="*70)
     print("INTEGRATION TEST SUMMARY")
     print("="*70)
 
-    print("\n📊 Simple SQL Generation:")
-    for provider in available_providers:
-        result = simple_results.get(provider)
-        status = "✅ PASS" if result else "❌ FAIL" if result is False else "⚠️  SKIP"
-        print(f"   {provider.value}: {status}")
-
-    print("\n📊 Schema Question:")
-    for provider in available_providers:
-        result = schema_results.get(provider)
-        status = "✅ PASS" if result else "❌ FAIL" if result is False else "⚠️  SKIP"
-        print(f"   {provider.value}: {status}")
+    lines = ["\n📊 Simple SQL Generation:"]
+    lines.extend(f"   {run.name}: {TEST_STATUS[simple_results.get(run.provider)]}" for run in provider_runs)
+    lines.append("\n📊 Schema Question:")
+    lines.extend(f"   {run.name}: {TEST_STATUS[schema_results.get(run.provider)]}" for run in provider_runs)
+    sys.stdout.write("\n".join(lines) + "\n")
 
     # Overall result
     all_simple_passed = all(r for r in simple_results.values() if r is not None)
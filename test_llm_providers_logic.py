@@ -0,0 +1,134 @@
+"""
+Test suite for the LLM provider logic in the Streamlit app.
+
+These tests need no provider SDK: imports, provider enum, model defaults,
+message formatting, history limits, configuration and API key mapping.
+Client construction is covered by test_llm_providers_sdk.py.
+
+Run with pytest (``pytest test_llm_providers_logic.py``); the ``app_module``
+and ``fake_llm`` fixtures live in ``conftest.py``. The tests share no state, so
+``pytest -n auto`` also works when pytest-xdist is installed.
+"""
+import pytest
+
+# Built once and sliced per case; large enough for every history-limit case.
+_CONV_HISTORY = tuple({"role": "user", "content": f"Question {i}"} for i in range(100))
+
+# Chat histories for split_system_and_conversation. Tests pass a list copy.
+_MESSAGES_WITH_SYSTEM = (
+    {"role": "system", "content": "You are a helpful assistant."},
+    {"role": "user", "content": "Hello"},
+    {"role": "assistant", "content": "Hi there!"},
+    {"role": "system", "content": "Additional context."},
+    {"role": "user", "content": "How are you?"},
+)
+_MESSAGES_NO_SYSTEM = (
+    {"role": "user", "content": "Hello"},
+    {"role": "assistant", "content": "Hi!"},
+)
+
+# Expected per-provider settings, keyed by LLMProvider value. The enum itself
+# is only available once the app_module fixture has imported the app.
+_EXPECTED_MODELS = {
+    "OpenAI": "gpt-4.1-mini",
+    "Anthropic": "claude-sonnet-4-5",
+    "Gemini": "gemini-2.5-flash",
+}
+_EXPECTED_ENV = {
+    "OpenAI": "OPENAI_API_KEY",
+    "Anthropic": "ANTHROPIC_API_KEY",
+    "Gemini": "GEMINI_API_KEY",
+}
+
+
+def test_imports(app_module):
+    """Test that all imports work correctly, including conditional imports."""
+    for name in (
+        "LLMProvider",
+        "LLMClientWrapper",
+        "AgentConfig",
+        "PROVIDER_MODEL_DEFAULTS",
+        "PROVIDER_API_KEY_ENV_VARS",
+        "initialise_llm_client",
+        "invoke_llm",
+        "split_system_and_conversation",
+    ):
+        assert hasattr(app_module, name)
+
+
+def test_provider_enum(app_module):
+    """Test LLMProvider enum values."""
+    assert app_module.LLMProvider.OPENAI.value == "OpenAI"
+    assert app_module.LLMProvider.ANTHROPIC.value == "Anthropic"
+    assert app_module.LLMProvider.GEMINI.value == "Gemini"
+
+
+@pytest.mark.parametrize("provider_name,expected_model", _EXPECTED_MODELS.items())
+def test_model_defaults(app_module, provider_name, expected_model):
+    """Test that model defaults are correct."""
+    provider = app_module.LLMProvider(provider_name)
+    actual_model = app_module.PROVIDER_MODEL_DEFAULTS[provider]
+    assert actual_model == expected_model
+
+
+def test_message_formatting(app_module):
+    """Test split_system_and_conversation function."""
+    # Test with system message
+    messages = list(_MESSAGES_WITH_SYSTEM)
+    system_prompt, conversation = app_module.split_system_and_conversation(messages)
+
+    assert system_prompt == "You are a helpful assistant.\n\nAdditional context."
+    assert conversation == [
+        {"role": "user", "content": "Hello"},
+        {"role": "assistant", "content": "Hi there!"},
+        {"role": "user", "content": "How are you?"},
+    ]
+    # The shared fixture is only safe to reuse if the input is left untouched
+    assert messages == list(_MESSAGES_WITH_SYSTEM)
+
+    # Test with no system message
+    system_prompt, conversation = app_module.split_system_and_conversation(list(_MESSAGES_NO_SYSTEM))
+    assert system_prompt is None
+    assert conversation == list(_MESSAGES_NO_SYSTEM)
+
+
+@pytest.mark.parametrize("n", [3, 6, 10, 100])
+def test_conversation_history_limit(app_module, fake_llm, n):
+    """Test that generate_sql_plan only sends the last six history messages."""
+    llm_client = fake_llm()
+    app_module.generate_sql_plan(
+        llm_client,
+        "gpt-4.1-mini",
+        "Question 100",
+        {},
+        200,
+        conversation_history=list(_CONV_HISTORY[:n]),
+    )
+
+    (request,) = llm_client.client.requests_for("plan")
+    messages = request["messages"]
+    assert messages[0]["role"] == "system"
+    assert '"question":"Question 100"' in messages[-1]["content"]
+    assert messages[1:-1] == [
+        {"role": "user", "content": f"Question {i}"} for i in range(max(n - 6, 0), n)
+    ]
+
+
+def test_config_structure(app_module, sample_config):
+    """Test AgentConfig dataclass structure."""
+    assert sample_config.base_url == "http://localhost:8005"
+    assert sample_config.user_id == "test-user"
+    assert sample_config.session_id == "test-session"
+    assert sample_config.use_cache is True
+    assert sample_config.maximum_bytes_billed == 100_000_000
+    assert sample_config.row_limit == 200
+    assert sample_config.model == "gpt-4.1-mini"
+    assert sample_config.provider == app_module.LLMProvider.OPENAI
+
+
+@pytest.mark.parametrize("provider_name,expected_env_var", _EXPECTED_ENV.items())
+def test_provider_api_key_mapping(app_module, provider_name, expected_env_var):
+    """Test that API key environment variables are correctly mapped."""
+    provider = app_module.LLMProvider(provider_name)
+    actual_env_var = app_module.PROVIDER_API_KEY_ENV_VARS[provider]
+    assert actual_env_var == expected_env_var
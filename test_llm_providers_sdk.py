@@ -0,0 +1,91 @@
+"""
+Test suite for LLM client construction in the Streamlit app.
+
+Covers initialise_llm_client for each provider: client construction, empty
+API keys and missing SDKs. The SDK modules are replaced with mocks, so no real
+client is built and these run whether or not the SDKs are installed.
+
+Run with pytest (``pytest test_llm_providers_sdk.py``); the ``app_module``
+fixture lives in ``conftest.py``.
+"""
+import sys
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Placeholder API keys, keyed by LLMProvider value.
+_DUMMY_KEYS = {
+    "OpenAI": "sk-dummy-key-for-testing",
+    "Anthropic": "sk-ant-dummy-key",
+    "Gemini": "dummy-gemini-key",
+}
+
+# None, empty and whitespace-only keys must all be rejected.
+_EMPTY_KEYS = (None, "", "   ", "\t", "\n\n")
+
+
+@contextmanager
+def _mock_sdk(app_module, provider):
+    """Patch the SDK entry point ``initialise_llm_client`` uses for ``provider``.
+
+    Yields the mock that should receive the API key and the object the
+    wrapper should hold as its client. Nothing real is constructed (no HTTP
+    transport or SSL context) and the result doesn't depend on which SDKs
+    are installed.
+    """
+    if provider is app_module.LLMProvider.OPENAI:
+        openai_sdk = MagicMock()
+        with patch.dict(sys.modules, {"openai": openai_sdk}):
+            yield openai_sdk.OpenAI, openai_sdk.OpenAI.return_value
+    elif provider is app_module.LLMProvider.ANTHROPIC:
+        anthropic_sdk = MagicMock()
+        with patch.dict(sys.modules, {"anthropic": anthropic_sdk}):
+            yield anthropic_sdk.Anthropic, anthropic_sdk.Anthropic.return_value
+    else:
+        genai = MagicMock()
+        google_sdk = MagicMock(generativeai=genai)
+        with patch.dict(
+            sys.modules, {"google": google_sdk, "google.generativeai": genai}
+        ):
+            yield genai.configure, genai
+
+
+@pytest.mark.parametrize("provider_name,api_key", _DUMMY_KEYS.items())
+def test_client_initialization(app_module, provider_name, api_key):
+    """Test client initialization for each provider."""
+    provider = app_module.LLMProvider(provider_name)
+    with _mock_sdk(app_module, provider) as (entry_point, client):
+        result = app_module.initialise_llm_client(provider, api_key)
+    entry_point.assert_called_once_with(api_key=api_key)
+    assert result.provider == provider
+    assert result.client is client
+
+
+@pytest.mark.parametrize("provider_name", _DUMMY_KEYS)
+@pytest.mark.parametrize("api_key", _EMPTY_KEYS)
+def test_empty_api_key_returns_none(app_module, provider_name, api_key):
+    """Test that empty API keys return None before any SDK is touched."""
+    provider = app_module.LLMProvider(provider_name)
+    with _mock_sdk(app_module, provider) as (entry_point, _):
+        assert app_module.initialise_llm_client(provider, api_key) is None
+    entry_point.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "provider_name,sdk_module",
+    [
+        ("OpenAI", "openai"),
+        ("Anthropic", "anthropic"),
+        ("Gemini", "google.generativeai"),
+    ],
+)
+def test_missing_sdk(app_module, provider_name, sdk_module):
+    """Test error handling for missing dependencies."""
+    # A None entry in sys.modules makes the import raise ImportError, as if
+    # the SDK were not installed.
+    with patch.dict(sys.modules, {sdk_module: None}):
+        with pytest.raises(RuntimeError, match="not installed"):
+            app_module.initialise_llm_client(
+                app_module.LLMProvider(provider_name), "dummy-key"
+            )